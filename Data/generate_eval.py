@@ -6,7 +6,7 @@ import re
 
 # Paths to your files
 data_dir = "Data/data_for_qdrant"
-files = ["primary_functional_rooms.json"]
+files = ["primary_functional_rooms.jsonl"]
 
 eval_data = []
 
@@ -32,7 +32,7 @@ def clean_and_shorten(text, max_sentences=3):
 for fname in files:
     path = os.path.join(data_dir, fname)
     with open(path, "r", encoding="utf-8") as f:
-        rules = json.load(f)
+        rules = [json.loads(line) for line in f if line.strip()]
 
     for rule in rules:
         zone = rule["metadata"].get("zone", "this area")
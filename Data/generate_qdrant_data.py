@@ -3,41 +3,78 @@ import re
 import json
 from pathlib import Path
 
-def parse_rules(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    pattern = re.compile(
-        r'---RULE_START:(?P<tag>[A-Z_0-9]+)---\s*(?P<text>.*?)\s*---RULE_END---',
-        re.DOTALL
-    )
-
-    results = []
-
-    for match in pattern.finditer(content):
-        tag = match.group('tag')
-        text = match.group('text').strip()
+RULE_START = re.compile(r'^---RULE_START:(?P<tag>[^-\s]*)---\s*$')
+RULE_END = re.compile(r'^---RULE_END---\s*$')
+VALID_TAG = re.compile(r'^(?P<zone>[A-Z0-9]+)_(?P<rule_id>[0-9A-Z]+)_(?P<category>[A-Z0-9]+(?:_[A-Z0-9]+)*)$')
+
+def parse_tag(tag):
+    """ZONE_ID_CATEGORY -> metadata dict, or None if the tag is malformed"""
+    match = VALID_TAG.match(tag)
+    if not match:
+        return None
+    return {
+        "zone": match.group("zone"),
+        "rule_id": match.group("rule_id"),
+        "category": match.group("category")
+    }
+
+def iter_rules(file_path):
+    """Yield rules one at a time, reading the file line by line.
+
+    Only the lines of the current rule are held in memory. Malformed tags,
+    nested starts and unterminated rules are reported and skipped.
+    """
+    tag = None
+    lines = []
 
-        parts = tag.split("_")
-        if len(parts) < 3:
-            continue  # Skip invalid tags
-
-        zone = parts[0]
-        rule_id = parts[1]
-        category = "_".join(parts[2:])
-
-        rule_entry = {
-            "page_content": text,
-            "metadata": {
-                "zone": zone,
-                "rule_id": rule_id,
-                "category": category
-            }
-        }
-
-        results.append(rule_entry)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            start = RULE_START.match(line)
+            if start:
+                if tag is not None:
+                    print(f"⚠️ {Path(file_path).name}:{line_no}: RULE_START before RULE_END of {tag}, dropping {tag}")
+                tag = start.group('tag')
+                lines = []
+                continue
+
+            if RULE_END.match(line):
+                if tag is None:
+                    print(f"⚠️ {Path(file_path).name}:{line_no}: RULE_END without RULE_START")
+                    continue
+                metadata = parse_tag(tag)
+                text = "".join(lines).strip()
+                if metadata is None:
+                    print(f"⚠️ {Path(file_path).name}:{line_no}: invalid tag {tag!r}, skipping")
+                elif not text:
+                    print(f"⚠️ {Path(file_path).name}:{line_no}: empty rule {tag}, skipping")
+                else:
+                    yield {"page_content": text, "metadata": metadata}
+                tag = None
+                lines = []
+                continue
+
+            if tag is not None:
+                lines.append(line)
+
+    if tag is not None:
+        print(f"⚠️ {Path(file_path).name}: rule {tag} has no RULE_END, skipping")
 
-    return results
+def parse_rules(file_path):
+    return list(iter_rules(file_path))
+
+def write_jsonl(rules, output_file):
+    """Write rules as JSON Lines (one rule per line); returns how many were written"""
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    count = 0
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        for rule in rules:
+            f.write(json.dumps(rule, ensure_ascii=False) + "\n")
+            count += 1
+    if count:
+        os.replace(tmp_file, output_file)
+    else:
+        tmp_file.unlink()
+    return count
 
 def process_all_files():
     base_dir = Path.cwd() / "Data"
@@ -51,20 +88,24 @@ def process_all_files():
     output_folder.mkdir(parents=True, exist_ok=True)
 
     file_count = 0
-    for file_path in input_folder.glob("*.txt"):
-        rules = parse_rules(file_path)
-        if not rules:
+    rule_count = 0
+    for file_path in sorted(input_folder.glob("*.txt")):
+        output_file = output_folder / f"{file_path.stem}.jsonl"
+        count = write_jsonl(iter_rules(file_path), output_file)
+        if not count:
             print(f"⚠️ No valid rules found in: {file_path.name}")
             continue
 
-        output_file = output_folder / f"{file_path.stem}.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(rules, f, indent=2, ensure_ascii=False)
+        # Older runs wrote pretty-printed .json; drop it so rules aren't loaded twice
+        legacy_file = output_folder / f"{file_path.stem}.json"
+        if legacy_file.exists():
+            legacy_file.unlink()
 
-        print(f"✅ Processed: {file_path.name} → {output_file.name}")
+        print(f"✅ Processed: {file_path.name} → {output_file.name} ({count} rules)")
         file_count += 1
+        rule_count += count
 
-    print(f"\n✅ Total files processed: {file_count}")
+    print(f"\n✅ Total files processed: {file_count} ({rule_count} rules)")
 
 if __name__ == "__main__":
     process_all_files()
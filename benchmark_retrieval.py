@@ -0,0 +1,145 @@
+# benchmark_retrieval.py
+# Retrieval-only quality + latency benchmark: no Groq, no RAGAS, deterministic.
+# Each Data/eval.json question was generated from one rule (zone + category), so a
+# retrieval "hit" is that rule showing up in the top-k. Runs offline against the
+# in-process index (VECTOR_BACKEND=numpy) unless VECTOR_BACKEND is set explicitly.
+#
+#   python benchmark_retrieval.py                      # report
+#   python benchmark_retrieval.py --min-recall 0.8     # exit 1 if recall@TOP_K drops below
+#   python benchmark_retrieval.py --json bench.json    # also save the numbers
+#   python benchmark_retrieval.py --dense-only         # skip BM25 fusion (compare with hybrid)
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+os.environ.setdefault("VECTOR_BACKEND", "numpy")  # offline by default
+
+import chains.rag_pipeline as rag_pipeline
+from chains.metrics import StageTimer
+from chains.rag_pipeline import TOP_K, _get_embeddings, _get_vectorstore, _retrieve
+
+EVAL_FILE = "Data/eval.json"
+K_VALUES = (1, 3, 5, 10)
+
+def category_group(category):
+    """'003_PROHIBITED_PLACEMENTS' -> 'PROHIBITED_PLACEMENTS' (tags carry a rule number for some zones)"""
+    return re.sub(r"^\d+_", "", category)
+
+def is_relevant(doc, item):
+    metadata = doc.metadata or {}
+    return metadata.get("zone") == item["zone"] and metadata.get("category") == item["category"]
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+def run_benchmark(eval_data, max_k):
+    embeddings = _get_embeddings()
+    _get_vectorstore()
+
+    questions = [item["question"] for item in eval_data]
+
+    # One batch for every question, as ingestion does
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents(questions)
+    embed_seconds = time.perf_counter() - start
+
+    _retrieve(questions[0], vectors[0], StageTimer(), k=max_k)  # warm caches / connections / BM25 index
+
+    latencies = []
+    ranks = []  # 1-based rank of the first relevant rule, None if not in top max_k
+    for item, vector in zip(eval_data, vectors):
+        start = time.perf_counter()
+        docs = _retrieve(item["question"], vector, StageTimer(), k=max_k)
+        latencies.append(time.perf_counter() - start)
+
+        rank = next((i + 1 for i, doc in enumerate(docs) if is_relevant(doc, item)), None)
+        ranks.append(rank)
+
+    n = len(eval_data)
+    search_seconds = sum(latencies)
+    report = {
+        "questions": n,
+        "backend": os.getenv("VECTOR_BACKEND"),
+        "retrieval": "hybrid" if rag_pipeline.HYBRID_ENABLED else "dense",
+        "recall": {
+            f"@{k}": sum(1 for r in ranks if r and r <= k) / n
+            for k in sorted(set(K_VALUES) | {TOP_K}) if k <= max_k
+        },
+        "mrr": sum(1.0 / r for r in ranks if r) / n,
+        "embed_batch_ms": embed_seconds * 1000,
+        "embed_qps": n / embed_seconds if embed_seconds else 0.0,
+        "search_qps": n / search_seconds if search_seconds else 0.0,
+        "search_p50_ms": percentile(latencies, 50),
+        "search_p95_ms": percentile(latencies, 95),
+    }
+
+    per_category = defaultdict(lambda: [0, 0])
+    for item, rank in zip(eval_data, ranks):
+        counts = per_category[category_group(item["category"])]
+        counts[0] += 1 if rank and rank <= TOP_K else 0
+        counts[1] += 1
+    report["category_hit_rate"] = {
+        category: {"hits": hits, "total": total, "hit_rate": hits / total}
+        for category, (hits, total) in sorted(per_category.items())
+    }
+    report["misses"] = [
+        item["question"] for item, rank in zip(eval_data, ranks) if not rank or rank > TOP_K
+    ]
+    return report
+
+def print_report(report):
+    print(f"\n📊 Retrieval benchmark ({report['questions']} questions, backend={report['backend']}, "
+          f"{report['retrieval']})")
+    for k, value in report["recall"].items():
+        print(f"   recall{k:<4} {value:.3f}")
+    print(f"   MRR        {report['mrr']:.3f}")
+    print(f"\n⏱️ Embedding: {report['embed_batch_ms']:.1f} ms for the batch ({report['embed_qps']:.0f} q/s)")
+    print(f"⏱️ Search:    {report['search_qps']:.0f} q/s, "
+          f"p50 {report['search_p50_ms']:.3f} ms, p95 {report['search_p95_ms']:.3f} ms")
+
+    print(f"\n🗂️ Hit rate @{TOP_K} by category:")
+    for category, stats in report["category_hit_rate"].items():
+        print(f"   {category:<28} {stats['hits']:>3}/{stats['total']:<3} {stats['hit_rate']:.2f}")
+
+    if report["misses"]:
+        print(f"\n❌ Not in top {TOP_K}:")
+        for question in report["misses"]:
+            print(f"   - {question}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark over Data/eval.json")
+    parser.add_argument("--eval-file", default=EVAL_FILE)
+    parser.add_argument("--max-k", type=int, default=max(K_VALUES))
+    parser.add_argument("--min-recall", type=float, default=None,
+                        help=f"fail (exit 1) if recall@{TOP_K} is below this")
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    parser.add_argument("--dense-only", action="store_true", help="dense search only, no BM25 fusion")
+    args = parser.parse_args()
+    if args.dense_only:
+        rag_pipeline.HYBRID_ENABLED = False
+
+    with open(args.eval_file, "r", encoding="utf-8") as f:
+        eval_data = json.load(f)
+
+    report = run_benchmark(eval_data, max(args.max_k, TOP_K))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report saved to {args.json}")
+
+    recall = report["recall"][f"@{TOP_K}"]
+    if args.min_recall is not None and recall < args.min_recall:
+        print(f"\n❌ recall@{TOP_K} {recall:.3f} is below the required {args.min_recall:.3f}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Semantic answer cache for route_query.
+# Most traffic is near-identical questions ("where should the kitchen be",
+# "kitchen direction?"), so answers are reused when a new query is an exact
+# normalized match or its embedding is close enough to a cached query.
+# A near-duplicate only counts when it names the same zones and directions (the caller's
+# signature): MiniLM scores "remedies for a northeast kitchen" and "... southwest kitchen"
+# as near-identical, but they need different answers.
+# Bounded size (LRU), per-entry TTL, and cleared whenever the corpus version changes.
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+class SemanticAnswerCache:
+    """Thread-safe LRU + TTL cache keyed on normalized query text and embedding."""
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600.0, threshold: float = 0.92):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.corpus_version = None
+        self._entries = OrderedDict()  # normalized query -> (unit vector, answer, stored_at, signature)
+        self._keys = []
+        self._matrix = None  # stacked vectors of _keys, rebuilt lazily after writes
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _check_version(self, corpus_version):
+        if corpus_version != self.corpus_version:
+            self._entries.clear()
+            self._matrix = None
+            self.corpus_version = corpus_version
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, (_, _, stored_at, _) in self._entries.items() if now - stored_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, query: str, vector: List[float], corpus_version=None,
+               signature: Hashable = None) -> Optional[str]:
+        """Return a cached answer for this query, or for a near-duplicate stored with the same signature."""
+        key = normalize_query(query)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version(corpus_version)
+            self._evict_expired(now)
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][1]
+
+            if not self._entries:
+                return None
+
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k][0] for k in self._keys])
+
+            scores = self._matrix @ _unit(vector)
+            same = np.fromiter((self._entries[k][3] == signature for k in self._keys), dtype=bool, count=len(self._keys))
+            scores = np.where(same, scores, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+
+            best_key = self._keys[best]
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1]
+
+    def store(self, query: str, vector: List[float], answer: str, corpus_version=None,
+              signature: Hashable = None):
+        key = normalize_query(query)
+        with self._lock:
+            self._check_version(corpus_version)
+            self._entries[key] = (_unit(vector), answer, time.monotonic(), signature)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
@@ -0,0 +1,110 @@
+# Shared, pooled network clients for Qdrant and Groq.
+# Every pipeline and ingestion script builds its clients here instead of with library
+# defaults, so connections are kept alive and reused (no TLS handshake per query) and the
+# transport, pool size, timeouts and keep-alive are set in one place. Each uvicorn worker
+# is its own process and builds its own pool on first use.
+#
+#   QDRANT_TRANSPORT=http|http2|grpc   REST over HTTP/1.1 (default), REST over HTTP/2, or gRPC
+#   QDRANT_TIMEOUT=30                  seconds per request
+#   QDRANT_POOL_SIZE=16                max open REST connections (all kept alive)
+#   QDRANT_KEEPALIVE_EXPIRY=60         seconds an idle REST connection stays open
+#   QDRANT_GRPC_KEEPALIVE_MS=30000     gRPC keep-alive ping interval on an idle channel
+#   GROQ_HTTP2=1                       multiplex concurrent completions over one connection
+#   GROQ_TIMEOUT=60, GROQ_POOL_SIZE=16, GROQ_KEEPALIVE_EXPIRY=60
+
+import os
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+
+QDRANT_TRANSPORTS = ("http", "http2", "grpc")
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+QDRANT_KEEPALIVE_EXPIRY = float(os.getenv("QDRANT_KEEPALIVE_EXPIRY", "60"))
+QDRANT_GRPC_KEEPALIVE_MS = int(os.getenv("QDRANT_GRPC_KEEPALIVE_MS", "30000"))
+
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "1").lower() not in ("0", "false", "no")
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_POOL_SIZE = int(os.getenv("GROQ_POOL_SIZE", "16"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+
+
+def qdrant_transport() -> str:
+    transport = os.getenv("QDRANT_TRANSPORT", "http").strip().lower()
+    if transport not in QDRANT_TRANSPORTS:
+        raise ValueError(f"QDRANT_TRANSPORT must be one of {', '.join(QDRANT_TRANSPORTS)}, not '{transport}'")
+    return transport
+
+
+def _http2_available(who: str) -> bool:
+    """httpx only speaks HTTP/2 with the h2 package installed; fall back to HTTP/1.1 without it."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print(f"⚠️ HTTP/2 requested for {who} but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+
+
+def make_qdrant_client(
+    url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    timeout: Optional[int] = None,
+    pool_size: Optional[int] = None,
+):
+    """QdrantClient with the configured transport and connection pool.
+
+    Defaults to QDRANT_URL / QDRANT_API_KEY (Qdrant Cloud); pass host/port for a local instance.
+    Build one per process and share it: the client is thread-safe and owns the pool.
+    """
+    from qdrant_client import QdrantClient
+
+    if host is None and url is None:
+        url = os.getenv("QDRANT_URL")
+        api_key = api_key or os.getenv("QDRANT_API_KEY")
+
+    transport = qdrant_transport()
+    pool_size = pool_size or QDRANT_POOL_SIZE
+    kwargs = {
+        "timeout": timeout or QDRANT_TIMEOUT,
+        # REST is still used for a few calls in gRPC mode, so the pool is always configured
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=QDRANT_KEEPALIVE_EXPIRY,
+        ),
+        "http2": transport == "http2" and _http2_available("Qdrant"),
+    }
+    if transport == "grpc":
+        kwargs["prefer_grpc"] = True
+        kwargs["grpc_options"] = {
+            "grpc.keepalive_time_ms": QDRANT_GRPC_KEEPALIVE_MS,
+            "grpc.keepalive_timeout_ms": 10000,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+        }
+
+    if host is not None:
+        return QdrantClient(host=host, port=port or 6333, api_key=api_key, **kwargs)
+    return QdrantClient(url=url, api_key=api_key, **kwargs)
+
+
+@lru_cache(maxsize=1)
+def groq_http_client() -> httpx.Client:
+    """Process-wide pooled httpx client for the Groq SDK (ChatGroq(http_client=...)).
+
+    Only the sync client is shared; an httpx.AsyncClient is tied to the event loop that
+    opened its connections, so async callers keep the SDK's own.
+    """
+    return httpx.Client(
+        http2=GROQ_HTTP2 and _http2_available("Groq"),
+        timeout=httpx.Timeout(GROQ_TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=GROQ_POOL_SIZE,
+            max_keepalive_connections=GROQ_POOL_SIZE,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        ),
+    )
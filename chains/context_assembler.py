@@ -0,0 +1,153 @@
+# Token-budgeted context for the RAG prompt.
+# Stuffing the top rules verbatim sends ~3 x 170 tokens of paragraphs (markdown ** included)
+# for a 2-4 line answer. Instead:
+#   - markup is stripped and each rule split into sentences
+#   - sentences are ranked by cosine similarity to the query vector; the corpus sentence
+#     vectors are written next to the embedding artifact at ingestion (sentence_vectors.npz) and
+#     loaded, or embedded at warm-up, so a query never pays a forward pass for them
+#   - the best sentences are taken until the token budget is spent, skipping sentences that
+#     repeat one already taken (overlapping rules say the same thing in the same words)
+#   - the chosen sentences are printed rule by rule, in their original order
+# Fewer prompt tokens means lower Groq latency and more queries per TPM quota.
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from chains.rate_limiter import estimate_tokens
+
+_MARKUP = re.compile(r"(\*\*|__|`|^#+\s*|^\s*[-*]\s+)", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(A-Z0-9])")
+_WHITESPACE = re.compile(r"\s+")
+
+# Two sentences this similar say the same thing
+DUPLICATE_SIMILARITY = 0.92
+
+SENTENCE_FILE = "sentence_vectors.npz"
+
+
+def strip_markup(text: str) -> str:
+    """Drop markdown emphasis, headings and bullets; collapse whitespace."""
+    return _WHITESPACE.sub(" ", _MARKUP.sub("", text)).strip()
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(strip_markup(text)) if sentence.strip()]
+
+
+def answer_token_cap(max_lines: int, tokens_per_line: int = 40, slack: int = 32) -> int:
+    """Output-token cap for an answer the prompt limits to max_lines lines."""
+    return max_lines * tokens_per_line + slack
+
+
+class ContextAssembler:
+    """Builds the prompt context from retrieved rules within a token budget."""
+
+    def __init__(self, embeddings: Embeddings, max_tokens: int = 300, max_cache: int = 20000):
+        self.embeddings = embeddings
+        self.max_tokens = max_tokens
+        self.max_cache = max_cache
+        self._corpus: Dict[str, np.ndarray] = {}   # corpus sentence -> unit vector, never evicted
+        self._vectors: Dict[str, np.ndarray] = {}  # other sentences seen at query time
+        self._lock = threading.Lock()
+
+    def _embed(self, sentences: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _vector(self, sentence: str) -> Optional[np.ndarray]:
+        vector = self._corpus.get(sentence)
+        return vector if vector is not None else self._vectors.get(sentence)
+
+    def _sentence_vectors(self, sentences: List[str]) -> np.ndarray:
+        # Local snapshot: another thread may clear the query-time cache at any point after this
+        found = {}
+        for sentence in dict.fromkeys(sentences):
+            vector = self._vector(sentence)
+            if vector is not None:
+                found[sentence] = vector
+        missing = [s for s in dict.fromkeys(sentences) if s not in found]
+        if missing:
+            # Only text that is not in the corpus (edited rules before re-ingestion) gets here
+            vectors = self._embed(missing)
+            found.update(zip(missing, vectors))
+            with self._lock:
+                if len(self._vectors) + len(missing) > self.max_cache:
+                    self._vectors.clear()
+                self._vectors.update(zip(missing, vectors))
+        return np.stack([found[s] for s in sentences])
+
+    def precompute(self, texts: Iterable[str], batch_size: int = 256) -> int:
+        """Embed every sentence of texts (the rule corpus) not loaded yet; returns how many."""
+        sentences = dict.fromkeys(s for text in texts for s in split_sentences(text))
+        missing = [s for s in sentences if s not in self._corpus]
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            self._corpus.update(zip(chunk, self._embed(chunk)))
+        return len(missing)
+
+    def save(self, out_dir: str, texts: Optional[Iterable[str]] = None):
+        """Write the corpus sentence vectors (only those of texts, when given) as SENTENCE_FILE."""
+        keep = None if texts is None else {s for text in texts for s in split_sentences(text)}
+        sentences = [s for s in self._corpus if keep is None or s in keep]
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, SENTENCE_FILE)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, sentences=np.array(sentences, dtype=str),
+                     vectors=np.stack([self._corpus[s] for s in sentences]) if sentences else np.zeros((0, 0), np.float32))
+        os.replace(path + ".tmp", path)
+
+    def load(self, artifact_dir: str) -> int:
+        """Load SENTENCE_FILE from artifact_dir if present; returns how many sentences."""
+        path = os.path.join(artifact_dir, SENTENCE_FILE)
+        if not os.path.exists(path):
+            return 0
+        with np.load(path) as data:
+            sentences, vectors = data["sentences"].tolist(), data["vectors"].astype(np.float32)
+        self._corpus.update(zip(sentences, vectors))
+        return len(sentences)
+
+    def assemble(self, docs, query_vector: Optional[List[float]] = None) -> str:
+        """Context string from docs (retrieval order); whole rules if there is no query vector."""
+        if not docs:
+            return ""
+        rules = [split_sentences(doc.page_content) for doc in docs]
+        if query_vector is None:
+            return "\n\n".join(" ".join(sentences) for sentences in rules)
+
+        flat = [(i, j, sentence) for i, sentences in enumerate(rules) for j, sentence in enumerate(sentences)]
+        if not flat:
+            return ""
+        vectors = self._sentence_vectors([sentence for _, _, sentence in flat])
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = vectors @ query
+
+        chosen, chosen_vectors, used = set(), [], 0
+        for idx in np.argsort(-scores, kind="stable"):
+            i, j, sentence = flat[idx]
+            cost = estimate_tokens(sentence)
+            if used + cost > self.max_tokens:
+                continue  # a shorter, lower-ranked sentence may still fit
+            if chosen_vectors and float(np.max(np.stack(chosen_vectors) @ vectors[idx])) >= DUPLICATE_SIMILARITY:
+                continue
+            chosen.add((i, j))
+            chosen_vectors.append(vectors[idx])
+            used += cost
+        if not chosen:
+            # Budget smaller than any sentence: still send the best one
+            best = int(np.argmax(scores))
+            chosen.add(flat[best][:2])
+
+        blocks = []
+        for i, sentences in enumerate(rules):
+            kept = [sentence for j, sentence in enumerate(sentences) if (i, j) in chosen]
+            if kept:
+                blocks.append(" ".join(kept))
+        return "\n\n".join(blocks)
@@ -0,0 +1,161 @@
+# Persisted embedding artifact for the Vaasthu rule corpus.
+# Written by db/qdrant_setup.py at ingestion time, read by the serving pipelines.
+#
+# Layout (next to the data, default Data/embedding_artifact/):
+#   embeddings.npy  -> (n_rules, dim) row-normalized float32/float16 matrix
+#   rules.json      -> per-row sidecar: point id, content hash, page_content, metadata
+#   manifest.json   -> format version, model, embedding backend, dim, dtype, count, corpus hash
+#
+# Serving loads embeddings.npy with mmap_mode="r", so every worker process
+# shares one page-cache copy and nothing is re-embedded at startup.
+
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import numpy as np
+
+from chains.embedding_backend import backends_compatible
+
+ARTIFACT_VERSION = 1
+
+VECTORS_FILE = "embeddings.npy"
+RULES_FILE = "rules.json"
+MANIFEST_FILE = "manifest.json"
+
+# Fixed namespace so the same rule always maps to the same point id
+_RULE_NAMESPACE = uuid.UUID("6f1c2a7e-4b1d-5e7a-9a0c-7661617374a1")
+
+
+def rule_key(metadata: dict) -> str:
+    """Stable rule identity from its tag metadata, e.g. KITCHEN_001_PLACEMENT."""
+    return "_".join(
+        str(metadata.get(field, "")) for field in ("zone", "rule_id", "category")
+    )
+
+
+def rule_point_id(metadata: dict) -> str:
+    """Deterministic UUID for a rule (Qdrant point ids must be UUIDs or ints)."""
+    return str(uuid.uuid5(_RULE_NAMESPACE, rule_key(metadata)))
+
+
+def content_hash(text: str, metadata: dict) -> str:
+    """SHA-256 of the rule text + metadata; changes whenever the rule changes."""
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def corpus_hash(content_hashes: List[str]) -> str:
+    """Order-independent hash of the whole corpus (used as the corpus version)."""
+    digest = hashlib.sha256()
+    for h in sorted(content_hashes):
+        digest.update(h.encode("ascii"))
+    return digest.hexdigest()
+
+
+def _replace_atomically(path: str, write_fn):
+    tmp_path = path + ".tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_artifact(
+    out_dir: str,
+    texts: List[str],
+    metadatas: List[dict],
+    vectors,
+    model_name: str,
+    dtype: str = "float32",
+    backend: str = "torch",
+) -> dict:
+    """Normalize and persist the vectors plus sidecar and manifest. Returns the manifest."""
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported artifact dtype: {dtype}")
+    if len(texts) != len(metadatas) or len(texts) != len(vectors):
+        raise ValueError("texts, metadatas and vectors must have the same length")
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = np.ascontiguousarray(matrix / norms, dtype=dtype)
+
+    rules = [
+        {
+            "id": rule_point_id(metadata),
+            "content_hash": content_hash(text, metadata),
+            "page_content": text,
+            "metadata": metadata,
+        }
+        for text, metadata in zip(texts, metadatas)
+    ]
+
+    manifest = {
+        "version": ARTIFACT_VERSION,
+        "model": model_name,
+        "embedding_backend": backend,
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "dtype": dtype,
+        "count": len(rules),
+        "corpus_hash": corpus_hash([rule["content_hash"] for rule in rules]),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    def _save_vectors(path):
+        with open(path, "wb") as f:
+            np.save(f, matrix)
+
+    def _save_json(obj):
+        def _write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, ensure_ascii=False)
+        return _write
+
+    # Manifest last: a reader never sees a manifest pointing at half-written files
+    _replace_atomically(os.path.join(out_dir, VECTORS_FILE), _save_vectors)
+    _replace_atomically(os.path.join(out_dir, RULES_FILE), _save_json(rules))
+    _replace_atomically(os.path.join(out_dir, MANIFEST_FILE), _save_json(manifest))
+    return manifest
+
+
+def artifact_exists(artifact_dir: str) -> bool:
+    return os.path.exists(os.path.join(artifact_dir, MANIFEST_FILE))
+
+
+def read_manifest(artifact_dir: str) -> dict:
+    with open(os.path.join(artifact_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def artifact_in_query_space(artifact_dir: str, embeddings, backend: str) -> bool:
+    """Was the artifact embedded by the same model, in the same vector space, as queries from `embeddings`?"""
+    if not artifact_exists(artifact_dir):
+        return False
+    manifest = read_manifest(artifact_dir)
+    return (manifest.get("model") in (None, getattr(embeddings, "model_name", None))
+            and backends_compatible(manifest.get("embedding_backend"), backend))
+
+
+def load_artifact(artifact_dir: str, mmap: bool = True) -> Tuple[np.ndarray, List[dict], dict]:
+    """Return (vectors, rules, manifest). Vectors are memory-mapped read-only by default."""
+    manifest = read_manifest(artifact_dir)
+    if manifest.get("version") != ARTIFACT_VERSION:
+        raise ValueError(
+            f"Embedding artifact version {manifest.get('version')} is not supported "
+            f"(expected {ARTIFACT_VERSION}); re-run db/qdrant_setup.py"
+        )
+
+    vectors = np.load(
+        os.path.join(artifact_dir, VECTORS_FILE),
+        mmap_mode="r" if mmap else None,
+    )
+    with open(os.path.join(artifact_dir, RULES_FILE), "r", encoding="utf-8") as f:
+        rules = json.load(f)
+
+    if len(rules) != vectors.shape[0]:
+        raise ValueError("Embedding artifact is inconsistent: rules and vectors differ in length")
+    return vectors, rules, manifest
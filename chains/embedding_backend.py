@@ -0,0 +1,61 @@
+# Which embedder produces query and rule vectors.
+#   EMBEDDING_BACKEND=torch      HuggingFaceEmbeddings (sentence-transformers on PyTorch), default
+#   EMBEDDING_BACKEND=onnx       fp32 ONNX export through onnxruntime — vector-compatible with torch
+#   EMBEDDING_BACKEND=onnx-int8  int8-quantized ONNX export — its own vector space
+# Ingestion records the backend in the embedding artifact manifest; serving refuses an
+# index built by an incompatible backend.
+
+import os
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_MODEL_DIR = os.getenv(
+    "ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "models", "all-MiniLM-L6-v2-onnx"),
+)
+
+# Backends whose vectors are interchangeable (fp32 ONNX reproduces the PyTorch model)
+_VECTOR_SPACE = {"torch": "fp32", "onnx": "fp32", "onnx-int8": "int8"}
+
+
+def embedding_backend() -> str:
+    backend = os.getenv("EMBEDDING_BACKEND", "torch").strip().lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {', '.join(EMBEDDING_BACKENDS)}, not '{backend}'")
+    return backend
+
+
+def backends_compatible(index_backend: Optional[str], query_backend: str) -> bool:
+    """Can queries embedded by query_backend be searched against an index built by index_backend?"""
+    # Artifacts written before the backend was recorded were built with torch
+    return _VECTOR_SPACE.get(index_backend or "torch") == _VECTOR_SPACE.get(query_backend)
+
+
+def load_embeddings(
+    backend: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    device: Optional[str] = None,
+) -> Embeddings:
+    """Build the embedder for `backend` (default: EMBEDDING_BACKEND). Heavy imports happen here."""
+    backend = backend or embedding_backend()
+
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        kwargs = {}
+        if device:
+            kwargs["model_kwargs"] = {"device": device}
+        if batch_size:
+            kwargs["encode_kwargs"] = {"batch_size": batch_size}
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, **kwargs)
+
+    from chains.onnx_embeddings import OnnxEmbeddings
+    return OnnxEmbeddings(
+        ONNX_MODEL_DIR,
+        backend=backend,
+        model_name=EMBEDDING_MODEL,
+        batch_size=batch_size or 32,
+        intra_op_threads=int(os.getenv("ONNX_THREADS", "0")) or None,
+    )
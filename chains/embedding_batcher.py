@@ -0,0 +1,89 @@
+# Micro-batching in front of the query embedder.
+# Under concurrency every /query used to run its own single-sentence forward pass; on CPU one
+# batched pass over N sentences costs little more than a single one. Callers enqueue their
+# text and block on a future; one dispatcher thread embeds whatever has queued up as a batch
+# and fans the vectors back out.
+#   - idle: a lone query is embedded immediately (no window, no added latency)
+#   - busy: queries that arrive while a batch is running form the next batch, topped up for
+#     at most max_wait_ms or until max_batch texts
+#   - failure: whatever goes wrong with a batch is raised in every caller waiting on it, the
+#     dispatcher keeps running, and a caller never waits longer than timeout_s
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from chains.metrics import EMBED_BATCH_SIZE
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """Embeddings wrapper that coalesces concurrent embed_query calls into embed_documents batches."""
+
+    def __init__(self, embeddings: Embeddings, max_batch: int = 32, max_wait_ms: float = 2.0,
+                 timeout_s: float = 30.0):
+        self.embeddings = embeddings
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout_s
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def model_name(self):
+        return getattr(self.embeddings, "model_name", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Already a batch (ingestion, benchmarks): no need to queue
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_dispatcher()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=self.timeout)
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is not None:
+            return
+        with self._start_lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _collect(self, batch: list):
+        """Top up batch (holding the first request) in place, so a failure loses none of it."""
+        # Nothing else waiting: the model was idle, embed right away
+        if self._queue.empty():
+            return
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(block=timeout > 0, timeout=max(timeout, 0)))
+            except queue.Empty:
+                break
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                self._collect(batch)
+                EMBED_BATCH_SIZE.observe(len(batch))
+                vectors = self.embeddings.embed_documents([text for text, _ in batch])
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Embedder returned {len(vectors)} vectors for {len(batch)} texts")
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except BaseException as e:
+                # Fail the whole batch rather than the thread: callers would block on it forever
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -0,0 +1,187 @@
+# Local intent classifier: decides whether a query goes to RAG, gets a templated greeting,
+# or is politely declined as out of domain — without calling the LLM.
+# Nearest centroid over the query embedding the pipeline already computes:
+#   vaasthu        one centroid per rule zone (rule texts + rule titles) plus generic Vaasthu questions
+#   greeting       one centroid per kind of small talk (hello, thanks, goodbye, ...)
+#   out_of_domain  one centroid per kind of off-topic request (news, coding, gibberish, ...)
+# Classifying is one (n_centroids x dim) matrix-vector product. Training examples and the
+# templated replies live in Data/intent_examples.json. Data/eval.json is never trained on:
+# evaluate_rag.py, benchmark_retrieval.py and loadtest.py measure routing with it.
+#
+# Ingestion saves the centroids next to the embedding artifact (intent_centroids.npz), so
+# serving processes load them instead of embedding the corpus at startup.
+
+import os
+import json
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from chains.embedding_artifact import artifact_in_query_space, load_artifact
+
+DOMAIN_LABEL = "vaasthu"
+INTENT_FILE = "intent_centroids.npz"
+
+
+class Intent(NamedTuple):
+    label: str             # "vaasthu", "greeting" or "out_of_domain"
+    group: str             # zone or small-talk kind of the closest centroid
+    score: float           # cosine similarity to that centroid
+    response: Optional[str]  # templated reply for non-domain intents
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over normalized sentence embeddings."""
+
+    def __init__(self, centroids: np.ndarray, groups: List[Tuple[str, str]], responses: Dict[Tuple[str, str], str]):
+        self.centroids = np.ascontiguousarray(_unit(np.asarray(centroids, dtype=np.float32)))
+        self.groups = groups
+        self.responses = responses
+
+    @classmethod
+    def train(cls, examples: Dict[Tuple[str, str], np.ndarray],
+              responses: Optional[Dict[Tuple[str, str], str]] = None) -> "IntentClassifier":
+        """examples: (label, group) -> (n, dim) example vectors; each group becomes one centroid."""
+        groups = sorted(key for key, vectors in examples.items() if len(vectors))
+        centroids = np.stack([_unit(np.asarray(examples[key], dtype=np.float32)).mean(axis=0) for key in groups])
+        return cls(centroids, groups, responses or {})
+
+    def _intent(self, best: int, score: float) -> Intent:
+        label, group = self.groups[best]
+        return Intent(label, group, score, self.responses.get((label, group)))
+
+    def classify(self, query_vector) -> Intent:
+        query = _unit(np.asarray(query_vector, dtype=np.float32))
+        scores = self.centroids @ query
+        best = int(np.argmax(scores))
+        return self._intent(best, float(scores[best]))
+
+    def classify_many(self, query_vectors) -> List[Intent]:
+        """classify() for a batch: one (n x dim) @ (dim x n_centroids) product."""
+        queries = _unit(np.asarray(query_vectors, dtype=np.float32))
+        if not len(queries):
+            return []
+        scores = queries @ self.centroids.T
+        best = np.argmax(scores, axis=1)
+        return [self._intent(int(b), float(scores[row, b])) for row, b in enumerate(best)]
+
+    def save(self, out_dir: str, examples_hash: str):
+        """Write the centroids, their groups and replies atomically as INTENT_FILE in out_dir."""
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, INTENT_FILE)
+        responses = [[label, group, reply] for (label, group), reply in self.responses.items()]
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                groups=np.array([list(key) for key in self.groups], dtype=str),
+                responses=np.array(json.dumps(responses, ensure_ascii=False)),
+                examples_hash=np.array(examples_hash),
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, artifact_dir: str, examples_hash: str) -> Optional["IntentClassifier"]:
+        """Saved classifier, or None if there is none or it was trained on other examples."""
+        path = os.path.join(artifact_dir, INTENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if str(data["examples_hash"]) != examples_hash:
+                return None
+            groups = [tuple(key) for key in data["groups"].tolist()]
+            responses = {(label, group): reply for label, group, reply in json.loads(str(data["responses"]))}
+            return cls(data["centroids"], groups, responses)
+
+
+def examples_hash(path: str) -> str:
+    """Fingerprint of the examples file; a saved classifier is stale when it changes."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def rule_title(text: str) -> Optional[str]:
+    """'Kitchen Placement According to Vaasthu: The kitchen ...' -> 'Kitchen Placement According to Vaasthu'."""
+    title, sep, _ = text.partition(":")
+    return title.strip() if sep and 0 < len(title) <= 120 else None
+
+
+def load_intent_examples(path: str) -> Tuple[Dict[Tuple[str, str], List[str]], Dict[Tuple[str, str], str]]:
+    """Read Data/intent_examples.json into (label, group) -> example texts, and -> reply template."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    texts, responses = {}, {}
+    for label, groups in data.items():
+        for group, spec in groups.items():
+            texts[(label, group)] = list(spec.get("examples", []))
+            if spec.get("response"):
+                responses[(label, group)] = spec["response"]
+    return texts, responses
+
+
+def build_intent_classifier(
+    embeddings: Embeddings,
+    rules: Iterable[dict],
+    examples_file: str,
+    rule_vectors: Optional[np.ndarray] = None,
+) -> IntentClassifier:
+    """Train from the rule corpus (zone centroids) and the small-talk set.
+
+    rule_vectors, when given, are the rules' precomputed embeddings (the ingestion artifact),
+    row-aligned with rules; otherwise the rule texts are embedded here.
+    """
+    rules = list(rules)
+    texts, responses = load_intent_examples(examples_file)
+
+    # Short domain examples grouped by zone: the rule titles, which read like the questions asked
+    zone_texts: Dict[str, List[str]] = defaultdict(list)
+    for rule in rules:
+        title = rule_title(str(rule["page_content"]))
+        if title:
+            zone_texts[str(rule.get("metadata", {}).get("zone", "GENERAL"))].append(title)
+
+    short_texts = [(key, text) for key, group in texts.items() for text in group]
+    short_texts += [((DOMAIN_LABEL, zone), text) for zone, group in zone_texts.items() for text in group]
+    short_vectors = np.asarray(embeddings.embed_documents([text for _, text in short_texts]), dtype=np.float32)
+
+    if rule_vectors is None:
+        rule_vectors = embeddings.embed_documents([str(rule["page_content"]) for rule in rules])
+    rule_vectors = np.asarray(rule_vectors, dtype=np.float32)
+
+    examples: Dict[Tuple[str, str], list] = defaultdict(list)
+    for (key, _), vector in zip(short_texts, short_vectors):
+        examples[key].append(vector)
+    for rule, vector in zip(rules, rule_vectors):
+        examples[(DOMAIN_LABEL, str(rule.get("metadata", {}).get("zone", "GENERAL")))].append(vector)
+
+    return IntentClassifier.train({key: np.stack(vectors) for key, vectors in examples.items()}, responses)
+
+
+def load_or_build_intent_classifier(
+    embeddings: Embeddings,
+    rules: Iterable[dict],
+    examples_file: str,
+    artifact_dir: str,
+    backend: str,
+) -> IntentClassifier:
+    """Centroids saved at ingestion; trained from rules and the small-talk set if missing or stale.
+
+    rules is only read when the classifier has to be trained without the artifact.
+    """
+    if artifact_in_query_space(artifact_dir, embeddings, backend):
+        classifier = IntentClassifier.load(artifact_dir, examples_hash(examples_file))
+        if classifier is not None:
+            return classifier
+        # Reuse the ingestion artifact's rule vectors: only the short examples get embedded
+        rule_vectors, artifact_rules, _ = load_artifact(artifact_dir)
+        return build_intent_classifier(embeddings, artifact_rules, examples_file, rule_vectors=rule_vectors)
+    return build_intent_classifier(embeddings, rules, examples_file)
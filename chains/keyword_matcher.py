@@ -0,0 +1,68 @@
+# Compiled keyword matcher (zone synonyms in chains/query_analyzer.py).
+# All keywords are folded into one trie-shaped regex with word boundaries, built once:
+#   - "exit" no longer fires on "existing", "east" no longer on "least"/"feast"
+#   - shared prefixes are matched once, so the per-query cost stays flat as the
+#     list grows to thousands of synonyms (including non-ASCII / multilingual terms)
+#   - find() reports which keywords matched, not just whether one did
+
+import re
+from typing import Dict, Iterable, List
+
+_WHITESPACE = re.compile(r"\s+")
+
+_END = ""  # trie terminal marker
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.lower()).strip()
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Render a set of words as a prefix-sharing regex, e.g. {north, northeast} -> north(?:east)?"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[_END] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch != _END]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if _END in node:
+            # Word may end here; the group is greedy so the longest keyword still wins
+            return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return render(trie)
+
+
+class KeywordMatcher:
+    """Whole-word (optionally plural) keyword matching with a single precompiled regex."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({_normalize(kw) for kw in keywords if kw and kw.strip()})
+        self._keyword_set = set(self.keywords)
+        self._pattern = None
+        if self.keywords:
+            # Lookarounds instead of \b: \b fails next to combining marks in Indic scripts
+            self._pattern = re.compile(r"(?<!\w)(" + _trie_regex(self.keywords) + r")(?:e?s)?(?!\w)")
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def find(self, text: str) -> List[str]:
+        """Distinct keywords found in text, in order of first appearance."""
+        if self._pattern is None:
+            return []
+        found = []
+        for match in self._pattern.finditer(_normalize(text)):
+            keyword = match.group(1)
+            if keyword in self._keyword_set and keyword not in found:
+                found.append(keyword)
+        return found
+
+    def search(self, text: str) -> bool:
+        return self._pattern is not None and self._pattern.search(_normalize(text)) is not None
@@ -0,0 +1,161 @@
+# BM25 inverted index over the rule texts, fused with dense retrieval by reciprocal rank.
+# Vaasthu questions hinge on exact terms ("brahmasthan", "borewell", "septic tank",
+# "southwest") that a sentence embedding can blur into a generic rule; BM25 ranks the rule
+# that names the element first. The corpus is a few hundred rules, so the whole index is a
+# dict of postings and a query costs microseconds.
+#
+# Written next to the embedding artifact at ingestion time (Data/embedding_artifact/bm25_index.json)
+# and loaded once per process; serving rebuilds it from the rule files if it is missing or stale.
+
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from chains.embedding_artifact import content_hash, corpus_hash, rule_key
+from chains.query_analyzer import MetadataFilter, metadata_matches
+
+BM25_FILE = "bm25_index.json"
+BM25_VERSION = 1
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Spellings folded to the corpus form: "north east" / "north-east" -> "northeast", "bore well" -> "borewell"
+_COMPOUNDS = re.compile(r"\b(north|south)[\s\-]+(east|west)\b|\b(bore)[\s\-]+(well)\b")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "its", "my", "of", "on", "or", "should", "the", "this", "to", "what",
+    "where", "which", "with", "according", "rule", "rules", "vaastu", "vaasthu", "vastu",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with compounds folded, stopwords dropped and plurals stripped."""
+    text = _COMPOUNDS.sub(lambda m: "".join(part for part in m.groups() if part), text.lower())
+    tokens = []
+    for token in _TOKEN.findall(text):
+        if token in _STOPWORDS:
+            continue
+        # Cheap plural folding: "tanks" -> "tank", "bedrooms" -> "bedroom" (not "glass")
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of rules."""
+
+    def __init__(self, rules: List[dict], k1: float = 1.5, b: float = 0.75):
+        # rules: [{"page_content", "metadata"}]
+        self.rules = rules
+        self.k1 = k1
+        self.b = b
+        self.corpus_hash = corpus_hash(
+            [content_hash(str(rule["page_content"]), rule.get("metadata", {})) for rule in rules]
+        )
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths = []
+        for doc_id, rule in enumerate(rules):
+            counts = Counter(tokenize(str(rule["page_content"])))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].append((doc_id, tf))
+        self.postings = dict(postings)
+        self._compute_stats()
+
+    def _compute_stats(self):
+        n = len(self.rules)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.rules)
+
+    def search(
+        self, query: str, k: int = 10, filter: Optional[MetadataFilter] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k rules by BM25 score (only rules sharing at least one term with the query)."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                if filter and not metadata_matches(self.rules[doc_id].get("metadata", {}), filter):
+                    continue
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1.0)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            (Document(page_content=self.rules[doc_id]["page_content"],
+                      metadata=dict(self.rules[doc_id].get("metadata", {}))), score)
+            for doc_id, score in top
+        ]
+
+    def save(self, out_dir: str):
+        """Persist the index (rules included) atomically as BM25_FILE in out_dir."""
+        os.makedirs(out_dir, exist_ok=True)
+        payload = {
+            "version": BM25_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "corpus_hash": self.corpus_hash,
+            "rules": [{"page_content": r["page_content"], "metadata": r.get("metadata", {})} for r in self.rules],
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+        path = os.path.join(out_dir, BM25_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, artifact_dir: str) -> Optional["BM25Index"]:
+        """Load a saved index; None if there is none or it was written by another format version."""
+        path = os.path.join(artifact_dir, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != BM25_VERSION:
+            return None
+
+        index = cls.__new__(cls)
+        index.rules = payload["rules"]
+        index.k1 = payload["k1"]
+        index.b = payload["b"]
+        index.corpus_hash = payload["corpus_hash"]
+        index.doc_lengths = payload["doc_lengths"]
+        index.postings = {term: [tuple(p) for p in docs] for term, docs in payload["postings"].items()}
+        index._compute_stats()
+        return index
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[List[Document]],
+    k: int = 60,
+    key: Callable[[dict], str] = rule_key,
+) -> List[Document]:
+    """Merge ranked lists: each doc scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Docs are identified by key(metadata) (zone/rule_id/category), so the same rule coming
+    from Qdrant and from the BM25 index counts once; the first list's Document is kept.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            doc_key = key(doc.metadata or {})
+            scores[doc_key] += 1.0 / (k + rank)
+            docs.setdefault(doc_key, doc)
+    return [docs[doc_key] for doc_key in sorted(scores, key=lambda d: scores[d], reverse=True)]
@@ -0,0 +1,216 @@
+# Record / replay ("cassette") layer for the Groq chat model.
+# record: every completion is appended to a JSONL file keyed by a hash of the prompt.
+# replay: completions are served from that file — no Groq key, no network, no quota —
+#         optionally delayed by a simulated latency so benchmarks still see an LLM-shaped wait.
+# Lets route_query / the FastAPI app be benchmarked deterministically on our own code paths.
+#
+#   LLM_CASSETTE_MODE     off (default) | record | replay
+#   LLM_CASSETTE_PATH     Data/llm_cassette.jsonl
+#   LLM_CASSETTE_LATENCY  none | recorded | fixed:800 | uniform:300,1200 | lognormal:800,0.5  (ms)
+#   LLM_CASSETTE_ON_MISS  error (default) | stub   — what replay does for an unrecorded prompt
+#   LLM_CASSETTE_SEED     seed for the simulated latency (default 0)
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(__file__), "..", "Data", "llm_cassette.jsonl")
+STUB_COMPLETION = "This is a recorded stand-in answer (no cassette entry for this prompt)."
+
+_CHUNK = re.compile(r"\S+\s*|\s+")
+_FIRST_TOKEN_SHARE = 0.2  # streamed replays spend 20% of the delay before the first chunk
+
+
+class CassetteMiss(KeyError):
+    """Replay mode was asked for a prompt that was never recorded."""
+
+
+def prompt_key(model: str, messages: List[BaseMessage]) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": [[message.type, message.content] for message in messages]},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Thread-safe prompt-hash -> completion store backed by an append-only JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted recording
+                    self._entries[entry["key"]] = entry  # later recordings win
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def put(self, key: str, model: str, prompt: str, completion: str, latency_ms: float):
+        entry = {"key": key, "model": model, "prompt": prompt, "completion": completion,
+                 "latency_ms": round(latency_ms, 1)}
+        with self._lock:
+            self._entries[key] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class LatencyModel:
+    """Simulated replay latency, parsed from LLM_CASSETTE_LATENCY."""
+
+    def __init__(self, spec: str = "none", seed: int = 0):
+        self.spec = (spec or "none").strip().lower()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        kind, _, args = self.spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        if kind not in ("none", "recorded", "fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown LLM_CASSETTE_LATENCY '{spec}'")
+
+    def seconds(self, entry: Optional[dict]) -> float:
+        with self._lock:
+            if self.kind == "recorded":
+                ms = (entry or {}).get("latency_ms", 0.0)
+            elif self.kind == "fixed":
+                ms = self.args[0]
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(self.args[0], self.args[1])
+            elif self.kind == "lognormal":
+                # args: median ms, sigma of the underlying normal
+                median, sigma = self.args[0], (self.args[1] if len(self.args) > 1 else 0.5)
+                ms = median * self._rng.lognormvariate(0.0, sigma)
+            else:
+                ms = 0.0
+        return ms / 1000.0
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records completions of `llm`, or replays them when `llm` is None."""
+
+    llm: Optional[BaseChatModel] = None
+    cassette: Any
+    model: str
+    mode: str = "replay"
+    latency: Any = None
+    on_miss: str = "error"
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "mode": self.mode}
+
+    def _lookup(self, key: str) -> dict:
+        entry = self.cassette.get(key)
+        if entry is not None:
+            return entry
+        if self.on_miss == "stub":
+            return {"completion": STUB_COMPLETION, "latency_ms": 0.0}
+        raise CassetteMiss(
+            f"No recorded completion for prompt {key[:12]} in {self.cassette.path}; "
+            f"record it first with LLM_CASSETTE_MODE=record"
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = prompt_key(self.model, messages)
+
+        if self.mode == "record":
+            start = time.perf_counter()
+            result = self.llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            completion = result.generations[0].message.content
+            self.cassette.put(key, self.model, messages[-1].content, completion,
+                              (time.perf_counter() - start) * 1000)
+            return result
+
+        entry = self._lookup(key)
+        delay = self.latency.seconds(entry) if self.latency else 0.0
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=entry["completion"]))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = prompt_key(self.model, messages)
+
+        if self.mode == "record":
+            start = time.perf_counter()
+            parts = []
+            for chunk in self.llm._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                parts.append(chunk.message.content)
+                yield chunk
+            self.cassette.put(key, self.model, messages[-1].content, "".join(parts),
+                              (time.perf_counter() - start) * 1000)
+            return
+
+        entry = self._lookup(key)
+        delay = self.latency.seconds(entry) if self.latency else 0.0
+        pieces = _CHUNK.findall(entry["completion"]) or [""]
+        per_piece = delay * (1 - _FIRST_TOKEN_SHARE) / len(pieces)
+        if delay:
+            time.sleep(delay * _FIRST_TOKEN_SHARE)
+        for i, piece in enumerate(pieces):
+            if i and per_piece:
+                time.sleep(per_piece)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+def cassette_mode() -> str:
+    return os.getenv("LLM_CASSETTE_MODE", "off").strip().lower()
+
+
+def with_cassette(llm: Optional[BaseChatModel], model: str) -> BaseChatModel:
+    """Wrap `llm` per LLM_CASSETTE_MODE; in replay mode `llm` may be None (never called)."""
+    mode = cassette_mode()
+    if mode in ("", "off"):
+        return llm
+    if mode not in ("record", "replay"):
+        raise ValueError(f"LLM_CASSETTE_MODE must be off, record or replay, not '{mode}'")
+    if mode == "record" and llm is None:
+        raise ValueError("LLM_CASSETTE_MODE=record needs a real LLM to record from")
+
+    path = os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE_PATH)
+    cassette = Cassette(path)
+    latency = LatencyModel(os.getenv("LLM_CASSETTE_LATENCY", "none"), int(os.getenv("LLM_CASSETTE_SEED", "0")))
+    print(f"📼 LLM cassette: {mode} ({len(cassette)} recorded completions in {path})")
+    return CassetteChatModel(
+        llm=llm if mode == "record" else None,
+        cassette=cassette,
+        model=model,
+        mode=mode,
+        latency=latency,
+        on_miss=os.getenv("LLM_CASSETTE_ON_MISS", "error").strip().lower(),
+    )
@@ -0,0 +1,136 @@
+# Per-request timing spans, routing counters and Prometheus metrics.
+# route_query / stream_query time each stage (rule lookup, embedding, intent, cache lookup,
+# query analysis, vector search, lexical search, prompt assembly, LLM) into a StageTimer;
+# every span also lands in a Prometheus histogram, exported by ui/app.py on GET /metrics.
+# ui/app.py writes one structured JSON log line per request from the same timer.
+
+import json
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Seconds; spans range from microseconds (rule lookup) to seconds (Groq)
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "vaasthu_stage_seconds",
+    "Time spent in each query pipeline stage",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "vaasthu_request_seconds",
+    "End-to-end query latency, including time queued for a worker",
+    ["endpoint", "branch"],
+    buckets=_BUCKETS,
+)
+QUEUE_SECONDS = Histogram(
+    "vaasthu_queue_wait_seconds",
+    "Time a query waited for a free inference worker",
+    ["endpoint"],
+    buckets=_BUCKETS,
+)
+BRANCH_TOTAL = Counter(
+    "vaasthu_route_branch_total",
+    "Queries by routing branch (rule, greeting, out_of_domain, cache, no_match, rag)",
+    ["branch"],
+)
+EMBED_BATCH_SIZE = Histogram(
+    "vaasthu_embed_batch_size",
+    "Queries embedded per forward pass by the embedding micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+ERRORS_TOTAL = Counter(
+    "vaasthu_query_errors_total",
+    "Queries that failed inside the pipeline",
+    ["endpoint"],
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+class StageTimer:
+    """Collects the stage timings and routing branch of one query."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.branch: Optional[str] = None
+
+    @contextmanager
+    def span(self, stage: str, observe: bool = True):
+        """Time a block; observe=False only accumulates (call observe(stage) once at the end)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+            if observe:
+                STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+
+    def observe(self, stage: str):
+        if stage in self.stages:
+            STAGE_SECONDS.labels(stage=stage).observe(self.stages[stage])
+
+    def set_branch(self, branch: str):
+        self.branch = branch
+        BRANCH_TOTAL.labels(branch=branch).inc()
+
+    def stages_ms(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+
+
+@contextmanager
+def shared_span(timers: Iterable[StageTimer], stage: str):
+    """Time one block that serves several queries (a batched forward pass): every query's
+    timer records it, the stage histogram observes it once."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for timer in timers:
+            timer.stages[stage] = timer.stages.get(stage, 0.0) + elapsed
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+
+# 🧾 One JSON line per request on stdout
+request_logger = logging.getLogger("vaasthu.request")
+if not request_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    request_logger.addHandler(_handler)
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+
+
+def log_request(endpoint: str, query: str, timer: Optional[StageTimer], status: str,
+                total_seconds: float, queue_seconds: float = 0.0, error: Optional[str] = None):
+    """Observe the request histograms and write the structured log line."""
+    branch = timer.branch if timer and timer.branch else "none"
+    REQUEST_SECONDS.labels(endpoint=endpoint, branch=branch).observe(total_seconds)
+    QUEUE_SECONDS.labels(endpoint=endpoint).observe(queue_seconds)
+    if error:
+        ERRORS_TOTAL.labels(endpoint=endpoint).inc()
+
+    record = {
+        "ts": round(time.time(), 3),
+        "endpoint": endpoint,
+        "query": query[:200],
+        "status": status,
+        "branch": branch,
+        "total_ms": round(total_seconds * 1000, 2),
+        "queue_ms": round(queue_seconds * 1000, 2),
+        "stages_ms": timer.stages_ms() if timer else {},
+    }
+    if error:
+        record["error"] = error
+    request_logger.info(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,242 @@
+# In-process vector store for the Vaasthu rule corpus.
+# The whole corpus is a few hundred rules, so the embeddings fit in one contiguous
+# NumPy matrix and top-k is a single matmul — no network hop to Qdrant. ✅
+# Exposes the same LangChain VectorStore interface as QdrantVectorStore, including the
+# {field: values} metadata filter, served from per-field row indexes (like Qdrant's payload indexes).
+
+import os
+import json
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from chains.embedding_artifact import load_artifact, rule_point_id
+from chains.embedding_backend import backends_compatible
+from chains.query_analyzer import MetadataFilter
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def iter_rule_docs(data_dir: str) -> Iterator[dict]:
+    """Yield {"page_content", "metadata"} rules from data_dir one at a time.
+
+    Reads the JSON Lines files written by Data/generate_qdrant_data.py line by
+    line; older pretty-printed .json files are still accepted.
+    """
+    for file in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, file)
+        if file.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        elif file.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                yield from data
+            else:
+                yield data
+
+
+def load_rule_docs(data_dir: str) -> List[dict]:
+    """Load every rule in data_dir into a list."""
+    return list(iter_rule_docs(data_dir))
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force cosine search over an in-memory (or memory-mapped) matrix.
+
+    Scores are cosine similarities (higher = closer), matching what
+    QdrantVectorStore returns for a cosine collection, so the routing
+    thresholds in the pipelines work unchanged.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        texts: Optional[List[str]] = None,
+        metadatas: Optional[List[dict]] = None,
+        vectors: Optional[np.ndarray] = None,
+        ids: Optional[List[str]] = None,
+        normalized: bool = False,
+    ):
+        self._embedding = embedding
+        self._texts = list(texts or [])
+        self._metadatas = list(metadatas or [{} for _ in self._texts])
+        self._ids = list(ids or [str(uuid.uuid4()) for _ in self._texts])
+        self._matrix = None
+        self._field_index: Dict[str, Dict[Any, np.ndarray]] = {}  # field -> value -> rows, built on demand
+        if vectors is not None and len(self._texts):
+            # Pre-normalized (artifact) matrices are used as-is so an mmap stays shared
+            self._matrix = vectors if normalized else _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas or [{} for _ in texts])
+        ids = list(ids or [str(uuid.uuid4()) for _ in texts])
+
+        vectors = _normalize_rows(np.asarray(self._embedding.embed_documents(texts), dtype=np.float32))
+        if self._matrix is None:
+            self._matrix = vectors
+        else:
+            self._matrix = np.ascontiguousarray(np.vstack([self._matrix, vectors.astype(self._matrix.dtype)]))
+
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        self._ids.extend(ids)
+        self._field_index = {}
+        return ids
+
+    def _rows_for_value(self, field: str, value: Any) -> np.ndarray:
+        if field not in self._field_index:
+            rows = defaultdict(list)
+            for i, metadata in enumerate(self._metadatas):
+                rows[metadata.get(field)].append(i)
+            self._field_index[field] = {v: np.asarray(r, dtype=np.int64) for v, r in rows.items()}
+        return self._field_index[field].get(value, np.empty(0, dtype=np.int64))
+
+    def _filter_rows(self, metadata_filter: MetadataFilter) -> np.ndarray:
+        """Sorted row numbers whose metadata matches every field of the filter."""
+        rows = None
+        for field, values in metadata_filter.items():
+            field_rows = np.unique(np.concatenate(
+                [np.empty(0, dtype=np.int64)] + [self._rows_for_value(field, v) for v in values]
+            ))
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+        return rows
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if self._matrix is None or k <= 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        query = query.astype(self._matrix.dtype, copy=False)
+
+        if filter:
+            # Score only the matching rows
+            rows = self._filter_rows(filter)
+            if not len(rows):
+                return []
+            scores = self._matrix[rows] @ query
+        else:
+            rows = None
+            scores = self._matrix @ query
+        k = min(k, len(scores))
+        # argpartition is O(n); only the k winners get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top_rows = top if rows is None else rows[top]
+
+        return [
+            (
+                Document(page_content=self._texts[i], metadata=dict(self._metadatas[i]), id=self._ids[i]),
+                float(score),
+            )
+            for i, score in zip(top_rows, scores[top])
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_json_dir(cls, data_dir: str, embedding: Embeddings) -> "NumpyVectorStore":
+        """Build the store from the same Data/data_for_qdrant files Qdrant is loaded from."""
+        texts, metadatas = [], []
+        for doc in iter_rule_docs(data_dir):
+            texts.append(str(doc["page_content"]))
+            metadatas.append(doc.get("metadata", {}))
+        ids = [rule_point_id(metadata) for metadata in metadatas]
+        return cls.from_texts(texts, embedding, metadatas=metadatas, ids=ids)
+
+    @classmethod
+    def from_artifact(
+        cls, artifact_dir: str, embedding: Embeddings, backend: Optional[str] = None
+    ) -> "NumpyVectorStore":
+        """Serve from the persisted ingestion artifact (memory-mapped, no re-embedding).
+
+        `backend` is the EMBEDDING_BACKEND queries are embedded with; it must share a
+        vector space with the backend recorded when the artifact was built.
+        """
+        vectors, rules, manifest = load_artifact(artifact_dir, mmap=True)
+        model_name = getattr(embedding, "model_name", None)
+        if model_name and manifest.get("model") and model_name != manifest["model"]:
+            raise ValueError(
+                f"Embedding artifact was built with '{manifest['model']}' "
+                f"but the pipeline embeds queries with '{model_name}'"
+            )
+        if backend and not backends_compatible(manifest.get("embedding_backend"), backend):
+            raise ValueError(
+                f"Embedding artifact was built with the '{manifest.get('embedding_backend', 'torch')}' "
+                f"backend but queries are embedded with '{backend}'; re-run ingestion with "
+                f"EMBEDDING_BACKEND={backend}"
+            )
+        return cls(
+            embedding,
+            texts=[rule["page_content"] for rule in rules],
+            metadatas=[rule["metadata"] for rule in rules],
+            vectors=vectors,
+            ids=[rule["id"] for rule in rules],
+            normalized=True,
+        )
@@ -0,0 +1,85 @@
+# ONNX Runtime sentence embedder for CPU serving.
+# Runs an exported all-MiniLM-L6-v2 (db/export_onnx_model.py) with the model's own
+# tokenizer.json, then applies the same mean pooling + L2 normalization as the
+# sentence-transformers pipeline — no torch import, a fraction of the RSS.
+#
+# Model directory layout:
+#   model.onnx        fp32 export (vectors match the PyTorch model to ~1e-6)
+#   model.int8.onnx   dynamically quantized weights (smaller/faster, slightly different vectors)
+#   tokenizer.json    fast tokenizer saved next to the export
+
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+ONNX_FILES = {
+    "onnx": "model.onnx",
+    "onnx-int8": "model.int8.onnx",
+}
+
+
+class OnnxEmbeddings(Embeddings):
+    """Mean-pooled, normalized sentence embeddings from an ONNX transformer export."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        backend: str = "onnx",
+        model_name: str = "all-MiniLM-L6-v2",
+        max_length: int = 256,
+        batch_size: int = 32,
+        intra_op_threads: Optional[int] = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if backend not in ONNX_FILES:
+            raise ValueError(f"Unknown ONNX backend '{backend}' (expected one of {', '.join(ONNX_FILES)})")
+        model_path = os.path.join(model_dir, ONNX_FILES[backend])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found; export it with `python db/export_onnx_model.py"
+                f"{' --int8' if backend == 'onnx-int8' else ''}`"
+            )
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()  # pad each batch to its longest sequence
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+
+        # Mean pooling over real tokens, then L2 normalize (sentence-transformers' Pooling + Normalize)
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
@@ -0,0 +1,61 @@
+# QdrantVectorStore with a scored search-by-vector.
+# The pipelines embed each query once and reuse that vector (answer cache,
+# routing, retrieval), so they need "search by vector, with scores" — which
+# langchain_qdrant only offers by re-embedding the query text.
+# Same method name as NumpyVectorStore, so both backends are interchangeable; both also
+# take the same {field: values} metadata filter (chains/query_analyzer.py), which runs on
+# Qdrant's payload indexes here.
+
+from typing import Any, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import models
+
+from chains.query_analyzer import MetadataFilter
+
+
+class ScoredQdrantVectorStore(QdrantVectorStore):
+
+    def _to_filter(self, metadata_filter: MetadataFilter) -> models.Filter:
+        """{"zone": ["KITCHEN"]} -> must match metadata.zone against any of the values."""
+        return models.Filter(must=[
+            models.FieldCondition(
+                key=f"{self.metadata_payload_key}.{field}",
+                match=models.MatchAny(any=list(values)),
+            )
+            for field, values in metadata_filter.items()
+        ])
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[models.Filter, MetadataFilter]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if isinstance(filter, dict):
+            filter = self._to_filter(filter) if filter else None
+        results = self.client.query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            using=self.vector_name,
+            query_filter=filter,
+            limit=k,
+            with_payload=True,
+            with_vectors=False,
+            **kwargs,
+        ).points
+
+        return [
+            (
+                self._document_from_point(
+                    result,
+                    self.collection_name,
+                    self.content_payload_key,
+                    self.metadata_payload_key,
+                ),
+                result.score,
+            )
+            for result in results
+        ]
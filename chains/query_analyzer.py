@@ -0,0 +1,176 @@
+# Query analyzer: turns the zone and intent a question names into a metadata filter.
+# Every rule is tagged zone / rule_id / category (Data/generate_qdrant_data.py), and Qdrant
+# keeps keyword payload indexes on them (db/qdrant_setup.py), so a filtered search only
+# scores the handful of rules for that zone instead of the whole collection.
+#
+#   "Where should the kitchen be?"         -> zone KITCHEN, intent placement
+#   "Can the septic tank be in northeast?" -> zone SEPTIC (no intent: zone only)
+#   "Remedies for a southwest toilet"      -> zone BATHROOM, intent remedial
+#
+# filters() lists the filters from narrowest to none; retrieval widens to the next one
+# when a filter matches nothing. signature() (zones + directions) keeps the answer cache
+# from serving "kitchen in the northeast" for "kitchen in the southwest".
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from chains.keyword_matcher import KeywordMatcher
+
+# {metadata field: accepted values}; a rule matches when every field has one of its values
+MetadataFilter = Dict[str, List[str]]
+
+# Names people use for each zone tag (the first word of the rule tag, e.g. SEPTIC_TANK_001 -> SEPTIC)
+ZONE_SYNONYMS = {
+    "KITCHEN": ["kitchen", "cooking area"],
+    "MASTER": ["master bedroom", "main bedroom"],
+    "CHILDREN": ["children bedroom", "children's bedroom", "childrens bedroom", "children room",
+                 "kids bedroom", "kids room", "child bedroom"],
+    "GUEST": ["guest bedroom", "guest room"],
+    "LIVING": ["living room", "drawing room", "hall"],
+    "DINING": ["dining room", "dining area", "dining hall", "dining"],
+    "STUDY": ["study room", "study"],
+    "HOME": ["home office", "office room", "work room"],
+    "POOJA": ["pooja room", "puja room", "prayer room", "pooja", "puja", "mandir"],
+    "BATHROOM": ["bathroom", "toilet", "washroom", "restroom"],
+    "STORE": ["store room", "storeroom", "storage room"],
+    "STAIRCASE": ["staircase", "stair case", "stairs", "stairway"],
+    "BALCONY": ["balcony", "veranda", "sit-out"],
+    "SEPTIC": ["septic tank", "septic"],
+    "UNDERGROUND": ["underground water tank", "underground tank", "sump", "borewell", "bore well"],
+    "OVERHEAD": ["overhead water tank", "overhead tank"],
+    "INVERTER": ["inverter", "electrical room", "generator"],
+    "PARKING": ["parking", "garage", "car park"],
+    "LAUNDRY": ["laundry", "washing area", "washing machine"],
+    "SERVANT": ["servant room", "servant quarters", "maid room"],
+    "WASTE": ["waste disposal", "garbage", "dustbin"],
+    "MAIN": ["main door", "main entrance", "main entry", "front door", "entrance door"],
+    "BOUNDARY": ["gate", "boundary entry"],
+    "COMPOUND": ["compound wall", "boundary wall"],
+    "BRAHMASTHAN": ["brahmasthan", "central zone", "center of the house", "centre of the house"],
+    "PLOT": ["plot slope", "plot shape", "plot"],
+    "ORIENTATION": ["building orientation", "house facing", "orientation"],
+    "COLUMNS": ["column", "pillar"],
+    "BEAMS": ["beam"],
+    "WINDOWS": ["window"],
+    "DOORS": ["door"],
+    "ZONAL": ["zonal energy", "energy grid"],
+}
+
+# Canonical directions and the spellings users type for them
+DIRECTION_PATTERN = re.compile(
+    r"\b(north[\s-]?east|north[\s-]?west|south[\s-]?east|south[\s-]?west"
+    r"|north|south|east|west|cent(?:er|re)|middle|brahmasthan)\b"
+)
+
+# What the question asks for; checked in this order (a remedy question often also says "avoid")
+_INTENT_PATTERNS = [
+    ("remedial", re.compile(
+        r"\b(remed\w*|fix\w*|correct\w*|cure|solutions?|already|existing|what if|what can i do)\b")),
+    ("prohibited", re.compile(
+        r"\b(avoid\w*|prohibit\w*|forbidden|should not|shouldn't|must not|never|wrong|bad|"
+        r"inauspicious|not (?:allowed|recommended|good))\b")),
+    ("placement", re.compile(
+        r"\b(where|which direction|directions?|locat\w*|place|placed|placement|position\w*|put|keep|ideal|best)\b")),
+]
+
+# Which rule categories answer each intent, matched on the category without its numbering
+# ("GRID_002_PROHIBITED_PLACEMENTS" -> "PROHIBITED_PLACEMENTS"); same order as _INTENT_PATTERNS
+_CATEGORY_PATTERNS = [
+    ("prohibited", re.compile(r"PROHIBITED|NOT_RECOMMENDED|RESTRICTION|FORBIDDEN")),
+    ("remedial", re.compile(r"REMED|CORRECTION|(?:^|_)SOLUTION")),
+    ("placement", re.compile(r"PLACEMENT|DIRECTION")),
+]
+_CATEGORY_NUMBERING = re.compile(r"^(?:[A-Z]+_)*\d+_")
+
+
+def canonical_direction(text: str) -> Optional[str]:
+    """Map 'North-East', 'north east', 'centre', ... to a canonical direction name."""
+    match = DIRECTION_PATTERN.fullmatch(text.strip().lower())
+    if not match:
+        return None
+    direction = re.sub(r"[\s-]", "", match.group(1))
+    if direction in ("centre", "middle", "brahmasthan"):
+        return "center"
+    return direction
+
+
+def category_intent(category: str) -> Optional[str]:
+    """'AREA_002_PROHIBITED_ZONES' -> 'prohibited', 'DIRECTION_GUIDELINES' -> 'placement', else None."""
+    name = _CATEGORY_NUMBERING.sub("", category.upper())
+    for intent, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(name):
+            return intent
+    return None
+
+
+def metadata_matches(metadata: dict, metadata_filter: Optional[MetadataFilter]) -> bool:
+    if not metadata_filter:
+        return True
+    return all(metadata.get(field) in values for field, values in metadata_filter.items())
+
+
+class QueryAnalysis:
+    """Zones and intent found in one question."""
+
+    def __init__(self, zones: List[str], intent: Optional[str], categories: List[str],
+                 directions: Optional[List[str]] = None):
+        self.zones = zones
+        self.intent = intent
+        self.categories = categories  # corpus categories answering `intent`
+        self.directions = directions or []  # canonical directions named in the question
+
+    def filters(self) -> List[Optional[MetadataFilter]]:
+        """Filters to try in order: zone + intent, zone only, then no filter."""
+        filters: List[Optional[MetadataFilter]] = []
+        if self.zones:
+            if self.categories:
+                filters.append({"zone": self.zones, "category": self.categories})
+            filters.append({"zone": self.zones})
+        filters.append(None)
+        return filters
+
+    def signature(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """What two questions must share to reuse each other's answer: zones and directions."""
+        return tuple(sorted(self.zones)), tuple(sorted(self.directions))
+
+    def to_dict(self) -> dict:
+        return {"zones": self.zones, "intent": self.intent, "directions": self.directions}
+
+
+class QueryAnalyzer:
+    """Zone and intent detection against the zones and categories present in the corpus."""
+
+    def __init__(self, zones: Iterable[str], categories: Iterable[str]):
+        zones = set(zones)
+        self._zone_of = {
+            name.lower(): zone
+            for zone, names in ZONE_SYNONYMS.items() if zone in zones
+            for name in names
+        }
+        self._matcher = KeywordMatcher(self._zone_of)
+        self._categories_by_intent: Dict[str, List[str]] = {}
+        for category in sorted(set(categories)):
+            intent = category_intent(category)
+            if intent:
+                self._categories_by_intent.setdefault(intent, []).append(category)
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[dict]) -> "QueryAnalyzer":
+        zones, categories = set(), set()
+        for rule in rules:
+            metadata = rule.get("metadata", {})
+            zones.add(str(metadata.get("zone", "")))
+            categories.add(str(metadata.get("category", "")))
+        return cls(zones, categories)
+
+    def analyze(self, query: str) -> QueryAnalysis:
+        zones = []
+        for name in self._matcher.find(query):
+            zone = self._zone_of[name]
+            if zone not in zones:
+                zones.append(zone)
+
+        lowered = query.lower()
+        intent = next((name for name, pattern in _INTENT_PATTERNS if pattern.search(lowered)), None)
+        directions = list(dict.fromkeys(canonical_direction(m.group(0)) for m in DIRECTION_PATTERN.finditer(lowered)))
+        return QueryAnalysis(zones, intent, self._categories_by_intent.get(intent, []), directions)
@@ -2,38 +2,150 @@
 # Use this rag_pipeline when we use the qdrant cloud ✅ 
 # instead of pulling qdrant image from docker ❌
 
-# This file is working fine but getting is issue while deploying in render.
+# Heavy components (sentence-transformer, Qdrant client, Groq client) are built lazily
+# on first use, so importing this module is cheap and uvicorn binds its port quickly.
+# ui/app.py calls warm_up() in the background at startup; pipeline_status() backs /readyz.
 
 import os
+import threading
+from functools import lru_cache, wraps
+from typing import List
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
-from langchain_qdrant import QdrantVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
-from qdrant_client import QdrantClient
-from langchain_groq import ChatGroq
-from langchain.schema.runnable import Runnable
-from langchain.chains import LLMChain
+from chains.numpy_vectorstore import NumpyVectorStore, iter_rule_docs
+from chains.embedding_artifact import (
+    MANIFEST_FILE,
+    artifact_exists,
+    artifact_in_query_space,
+    content_hash,
+    corpus_hash,
+    read_manifest,
+)
+from chains.answer_cache import SemanticAnswerCache
+from chains.rule_engine import RuleEngine
+from chains.llm_cassette import cassette_mode, with_cassette
+from chains.metrics import StageTimer, shared_span
+from chains.embedding_batcher import MicroBatchingEmbeddings
+from chains.embedding_backend import backends_compatible, embedding_backend, load_embeddings
+from chains.clients import GROQ_TIMEOUT, groq_http_client, make_qdrant_client
+from chains.lexical_index import BM25Index, reciprocal_rank_fusion
+from chains.query_analyzer import QueryAnalyzer
+from chains.context_assembler import ContextAssembler, answer_token_cap
+from chains.intent_classifier import DOMAIN_LABEL, IntentClassifier, load_or_build_intent_classifier
 
 # Load environment variables
 load_dotenv()
-os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
 
-# Connect to qdrant cloud
-client = QdrantClient(
-    url=os.getenv("QDRANT_URL"),
-    api_key=os.getenv("QDRANT_API_KEY")
+# 🗄️ Retrieval backend: "qdrant" (cloud) or "numpy" (in-process, no network hop)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+DATA_DIR = os.getenv(
+    "VAASTHU_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "data_for_qdrant"),
+)
+ARTIFACT_DIR = os.getenv(
+    "VAASTHU_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "embedding_artifact"),
 )
 
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
-# Initialize vectorstore
-vectorstore = QdrantVectorStore(
-    client=client,
-    collection_name="vaasthu_rules",
-    embedding=embeddings,
-)
+# -------------------------
+# 🧠 Lazy loaders (cached)
+# -------------------------
+
+_load_lock = threading.RLock()
+
+
+def _lazy_singleton(fn):
+    """lru_cache(maxsize=1) that also makes concurrent first calls build the object only once."""
+    cached = lru_cache(maxsize=1)(fn)
+
+    @wraps(fn)
+    def wrapper():
+        if cached.cache_info().currsize:
+            return cached()
+        with _load_lock:
+            return cached()
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+# 📦 Coalesce concurrent query embeddings into one forward pass
+EMBED_MICRO_BATCH = os.getenv("EMBED_MICRO_BATCH", "true").lower() == "true"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))  # seconds a query waits for its batch
+
+
+@_lazy_singleton
+def _get_embeddings():
+    # EMBEDDING_BACKEND=torch|onnx|onnx-int8; heavy imports happen inside load_embeddings
+    embeddings = load_embeddings()
+    if EMBED_MICRO_BATCH:
+        return MicroBatchingEmbeddings(
+            embeddings, max_batch=EMBED_MAX_BATCH, max_wait_ms=EMBED_MAX_WAIT_MS, timeout_s=EMBED_TIMEOUT
+        )
+    return embeddings
+
+
+@_lazy_singleton
+def _get_vectorstore():
+    embeddings = _get_embeddings()
+
+    if VECTOR_BACKEND == "numpy":
+        # Prefer the ingestion artifact (mmap, no re-embedding); else embed the JSON once
+        if artifact_exists(ARTIFACT_DIR):
+            return NumpyVectorStore.from_artifact(ARTIFACT_DIR, embeddings, backend=embedding_backend())
+        return NumpyVectorStore.from_json_dir(DATA_DIR, embeddings)
+
+    # The Qdrant collection is written by the same ingestion run as the artifact manifest
+    if artifact_exists(ARTIFACT_DIR):
+        index_backend = read_manifest(ARTIFACT_DIR).get("embedding_backend")
+        if not backends_compatible(index_backend, embedding_backend()):
+            print(f"⚠️ Qdrant collection was ingested with the '{index_backend}' embedding backend "
+                  f"but queries use '{embedding_backend()}'; scores will be off until it is re-ingested")
+
+    from chains.qdrant_store import ScoredQdrantVectorStore
+
+    # Connect to qdrant cloud (pooled, kept-alive connections; QDRANT_TRANSPORT picks http/http2/grpc)
+    client = make_qdrant_client()
+
+    return ScoredQdrantVectorStore(
+        client=client,
+        collection_name="vaasthu_rules",
+        embedding=embeddings,
+    )
+
+
+LLM_MODEL = "llama3-8b-8192"
+
+# ✂️ Token budgets: the prompt asks for a 2-4 line answer, so the output cap follows from that
+ANSWER_MAX_LINES = 4
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", str(answer_token_cap(ANSWER_MAX_LINES))))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "300"))  # estimated tokens of rule context per prompt
+
+
+@_lazy_singleton
+def _get_llm():
+    # 📼 LLM_CASSETTE_MODE=replay serves recorded completions: no Groq key or network needed
+    if cassette_mode() == "replay":
+        return with_cassette(None, LLM_MODEL)
+
+    from langchain_groq import ChatGroq
+    if not os.getenv("GROQ_API_KEY"):
+        raise RuntimeError("GROQ_API_KEY is not set in environment.")
+
+    # Groq LLM for RAG answers; LLM_CASSETTE_MODE=record saves every completion
+    return with_cassette(ChatGroq(
+        model_name=LLM_MODEL,
+        temperature=0.5,
+        model_kwargs={"top_p": 0.85},
+        max_tokens=ANSWER_MAX_TOKENS,
+        request_timeout=GROQ_TIMEOUT,
+        http_client=groq_http_client(),  # reuse warm connections across queries
+    ), LLM_MODEL)
+
 
 # Prompt template for RAG (Vaasthu-specific)
 template = """
@@ -61,89 +173,322 @@ PROMPT = PromptTemplate(
     template=template,
 )
 
-# Groq LLM (for both RAG and fallback)
-llm = ChatGroq(
-    model_name="llama3-8b-8192",
-    temperature=0.5,
-    model_kwargs={"top_p": 0.85},
-    max_tokens=1024,
+# 🧭 Routing: a local nearest-centroid intent classifier over the query embedding decides
+# between RAG, a templated greeting and a templated out-of-domain reply (no LLM call for those)
+INTENT_EXAMPLES_FILE = os.getenv(
+    "VAASTHU_INTENT_EXAMPLES",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "intent_examples.json"),
 )
 
-# Build RetrievalQA chain
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 3}),
-    chain_type="stuff",
-    chain_type_kwargs={"prompt": PROMPT},
-    return_source_documents=True,
+
+def _artifact_in_query_space() -> bool:
+    """Was the ingestion artifact embedded by the same model and vector space as queries?"""
+    return artifact_in_query_space(ARTIFACT_DIR, _get_embeddings(), embedding_backend())
+
+
+@_lazy_singleton
+def _get_intent_classifier() -> IntentClassifier:
+    """Centroids saved at ingestion; trained here from the corpus and small-talk set if missing or stale."""
+    return load_or_build_intent_classifier(
+        _get_embeddings(), iter_rule_docs(DATA_DIR), INTENT_EXAMPLES_FILE, ARTIFACT_DIR, embedding_backend()
+    )
+
+
+# 🔎 Number of rules stuffed into the prompt
+TOP_K = 3
+
+# 🔀 Hybrid retrieval: BM25 over the rule texts fused with the dense top-k (reciprocal rank fusion)
+HYBRID_ENABLED = os.getenv("HYBRID_ENABLED", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "10"))  # per retriever, before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+@_lazy_singleton
+def _get_bm25_index() -> BM25Index:
+    """The index written by ingestion next to the artifact, else built from the rule files."""
+    index = BM25Index.load(ARTIFACT_DIR)
+    if index is not None and index.corpus_hash == _corpus_version():
+        return index
+    return BM25Index(list(iter_rule_docs(DATA_DIR)))
+
+
+# 🧭 Search only the rules of the zone (and intent) the question names; widen when nothing matches
+QUERY_FILTER_ENABLED = os.getenv("QUERY_FILTER_ENABLED", "true").lower() == "true"
+
+
+@_lazy_singleton
+def _get_query_analyzer() -> QueryAnalyzer:
+    return QueryAnalyzer.from_rules(iter_rule_docs(DATA_DIR))
+
+
+def _analyze(query: str, timer: StageTimer):
+    with timer.span("query_analysis"):
+        return _get_query_analyzer().analyze(query)
+
+
+def _retrieve(query: str, query_vector, timer: StageTimer, k: int = TOP_K, analysis=None):
+    """Top-k rules for the query: dense search (narrowest matching filter) fused with BM25."""
+    filters = [None]
+    if QUERY_FILTER_ENABLED:
+        filters = (analysis or _analyze(query, timer)).filters()
+
+    # Narrowest filter first (zone + intent, then zone), no filter last
+    with timer.span("vector_search"):
+        for metadata_filter in filters:
+            docs_and_scores = _get_vectorstore().similarity_search_by_vector_with_score(
+                query_vector, k=max(k, HYBRID_CANDIDATES) if HYBRID_ENABLED else k, filter=metadata_filter
+            )
+            if docs_and_scores:
+                break
+    dense = [doc for doc, _ in docs_and_scores]
+    if not HYBRID_ENABLED or not dense:
+        return dense[:k]
+
+    with timer.span("lexical_search"):
+        lexical = [doc for doc, _ in _get_bm25_index().search(query, k=HYBRID_CANDIDATES, filter=metadata_filter)]
+        docs = reciprocal_rank_fusion([dense, lexical], k=RRF_K)
+    return docs[:k]
+
+# 💾 Semantic answer cache (exact or near-duplicate questions skip the LLM)
+answer_cache = SemanticAnswerCache(
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+
+# 📐 Deterministic answers for exact-match placement questions (no retrieval, no LLM)
+RULE_ENGINE_ENABLED = os.getenv("RULE_ENGINE_ENABLED", "true").lower() == "true"
+RULES_JSON_DIR = os.getenv(
+    "VAASTHU_RULES_JSON_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "json_data_format"),
 )
 
-# Fallback prompt for irrelevant input
-fallback_prompt = PromptTemplate.from_template("""
-You are a friendly assistant. Reply naturally to casual or random messages like greetings, small talk, or gibberish.
 
-Do NOT answer any Vaasthu or architecture related question. Just say: "Sorry, I can answer Vaasthu-related questions."
+@_lazy_singleton
+def _get_rule_engine() -> RuleEngine:
+    # Checked against the rule corpus so deterministic and RAG answers agree
+    return RuleEngine.from_json_dir(RULES_JSON_DIR, corpus=iter_rule_docs(DATA_DIR))
 
-User: {query}
-AI:""")
 
-fallback_chain = LLMChain(llm=llm, prompt=fallback_prompt)
+_corpus_state = {"manifest_mtime": None, "version": None}
 
-# 🔐 Critical Vaasthu keywords to force RAG routing
-CRITICAL_KEYWORDS = [
-    "bedroom", "master bedroom", "children bedroom", "guest bedroom",
-    "kitchen", "living room", "dining room", "study room", "pooja room", "store room",
-    "bathroom", "toilet", "septic tank", "water tank", "borewell",
-    "stairs", "staircase", "balcony", "veranda", "terrace",
-    "entrance", "main door", "entry", "exit",
-    "placement", "located", "positioned", "direction", "facing",
-    "north", "south", "east", "west", 
-    "northeast", "northwest", "southeast", "southwest", "center", "brahmasthan"
-]
 
-# 📊 Confidence thresholds
-HIGH_CONFIDENCE = 0.78
-LOW_CONFIDENCE = 0.60
+def _corpus_version() -> str:
+    """Hash of the rule corpus being served; cached answers are dropped when it changes.
 
-# ✅ Final routing function
-def route_query(query: str) -> dict:
-    query_lower = query.lower()
+    Taken from the ingestion artifact manifest (re-read whenever ingestion rewrites it),
+    otherwise hashed once from the rule files.
+    """
+    manifest_path = os.path.join(ARTIFACT_DIR, MANIFEST_FILE)
+    if artifact_exists(ARTIFACT_DIR):
+        mtime = os.path.getmtime(manifest_path)
+        if mtime != _corpus_state["manifest_mtime"]:
+            _corpus_state["version"] = read_manifest(ARTIFACT_DIR)["corpus_hash"]
+            _corpus_state["manifest_mtime"] = mtime
+    elif _corpus_state["version"] is None:
+        _corpus_state["version"] = corpus_hash(
+            [content_hash(str(doc["page_content"]), doc.get("metadata", {})) for doc in iter_rule_docs(DATA_DIR)]
+        )
+    return _corpus_state["version"]
+
+
+@_lazy_singleton
+def _get_context_assembler() -> ContextAssembler:
+    assembler = ContextAssembler(_get_embeddings(), max_tokens=CONTEXT_TOKEN_BUDGET)
+    # Corpus sentence vectors from ingestion; warm_up() embeds whatever is missing
+    if _artifact_in_query_space():
+        assembler.load(ARTIFACT_DIR)
+    return assembler
+
+
+def _format_context(docs, query_vector=None) -> str:
+    """The retrieved rules' most query-relevant sentences, markup stripped, within CONTEXT_TOKEN_BUDGET."""
+    return _get_context_assembler().assemble(docs, query_vector)
+
+
+def _answer_from_docs(query: str, docs, timer: StageTimer, query_vector=None) -> str:
+    """Fill the RAG prompt with already-retrieved docs (no second retrieval) and ask the LLM."""
+    with timer.span("prompt_assembly"):
+        prompt = PROMPT.format(context=_format_context(docs, query_vector), question=query)
+    with timer.span("llm"):
+        return _get_llm().invoke(prompt).content.strip()
 
-    # Keyword override check
-    if any(kw in query_lower for kw in CRITICAL_KEYWORDS):
-        result = qa_chain.invoke({"query": query})
-        return {
-            "query": query.strip(),
-            "response": result["result"].strip()
-        }
 
-    # Run similarity search manually to get score
-    docs_and_scores = vectorstore.similarity_search_with_score(query, k=1)
+def _rule_plan(query: str, timer: StageTimer):
+    """Plan for a question the rule engine answers outright, else None."""
+    if not RULE_ENGINE_ENABLED:
+        return None
+    with timer.span("rule_engine"):
+        rule_answer = _get_rule_engine().answer(query)
+    if rule_answer is None:
+        return None
+    return {"branch": "rule", "response": rule_answer, "docs": [], "intent": None,
+            "query_vector": None, "corpus_version": None}
 
-    if not docs_and_scores:
+
+def _plan_query(query: str, timer: StageTimer) -> dict:
+    """Rule lookup, embed, check the cache, retrieve and pick a routing branch — everything but the LLM call.
+
+    Returns a dict with the branch taken ("rule", "greeting", "out_of_domain", "cache", "no_match"
+    or "rag"), the classified intent, the retrieved docs, and "response" when no LLM call is needed.
+    Each stage is timed into `timer`.
+    """
+    rule_plan = _rule_plan(query, timer)
+    if rule_plan is not None:
+        return rule_plan
+
+    # One embedding, reused for routing, the cache lookup, retrieval and the answer
+    with timer.span("embedding"):
+        query_vector = _get_embeddings().embed_query(query)
+    with timer.span("intent"):
+        intent = _get_intent_classifier().classify(query_vector)
+    return _plan_embedded(query, query_vector, intent, timer)
+
+
+def _plan_embedded(query: str, query_vector, intent, timer: StageTimer) -> dict:
+    """The rest of _plan_query once the question is embedded and classified."""
+    plan = {
+        "query_vector": query_vector,
+        "corpus_version": None,
+        "docs": [],
+        "intent": intent,
+        "response": None,
+    }
+
+    # Greetings and off-topic messages get their templated reply
+    if intent.label != DOMAIN_LABEL:
+        return {**plan, "branch": intent.label,
+                "response": intent.response or "Sorry, I can answer Vaasthu-related questions."}
+
+    plan["corpus_version"] = _corpus_version()
+    # Zones and directions: the cache key for near-duplicates, and the retrieval filter
+    analysis = _analyze(query, timer)
+    plan["cache_signature"] = analysis.signature()
+
+    if ANSWER_CACHE_ENABLED:
+        with timer.span("cache_lookup"):
+            cached = answer_cache.lookup(query, query_vector, plan["corpus_version"], plan["cache_signature"])
+        if cached is not None:
+            return {**plan, "branch": "cache", "response": cached}
+
+    plan["docs"] = _retrieve(query, query_vector, timer, analysis=analysis)
+    if not plan["docs"]:
         # No match found at all
-        return {
-            "query": query.strip(),
-            "response": "Sorry, I have no idea about the query you asked."
-        }
-
-    top_doc, top_score = docs_and_scores[0]
-
-    if top_score >= HIGH_CONFIDENCE:
-        result = qa_chain.invoke({"query": query})
-        return {
-            "query": query.strip(),
-            "response": result["result"].strip()
-        }
-    elif top_score >= LOW_CONFIDENCE:
-        return {
-            "query": query.strip(),
-            "response": "❌Sorry, I have no idea about the query you asked."
-        }
-    else:
-        # Handle irrelevant/casual input
-        fallback = fallback_chain.invoke({"query": query})
-        return {
-            "query": query.strip(),
-            "response": fallback["text"].strip()
-        }
+        return {**plan, "branch": "no_match",
+                "response": "Sorry, I have no idea about the query you asked."}
+    return {**plan, "branch": "rag"}
+
+
+def _remember(query: str, plan: dict, response: str):
+    if ANSWER_CACHE_ENABLED and response:
+        answer_cache.store(query, plan["query_vector"], response, plan["corpus_version"], plan["cache_signature"])
+
+
+def answer_plan(query: str, plan: dict, timer: StageTimer) -> dict:
+    """Route result for a planned query; calls the LLM only when the plan has no response yet."""
+    response = plan["response"]
+    if response is None:
+        response = _answer_from_docs(query, plan["docs"], timer, plan["query_vector"])
+        _remember(query, plan, response)
+    return {
+        "query": query.strip(),
+        "response": response,
+        "branch": plan["branch"],
+    }
+
+
+# ✅ Final routing function
+def route_query(query: str, timer: StageTimer = None) -> dict:
+    timer = timer or StageTimer()
+    plan = _plan_query(query, timer)
+    timer.set_branch(plan["branch"])
+    return answer_plan(query, plan, timer)
+
+
+# 📦 Batch variant: plans many distinct questions together; the caller fans out answer_plan
+def plan_batch(queries: List[str], timers: List[StageTimer]) -> List[dict]:
+    """_plan_query for a batch: the questions the rule engine does not answer are embedded in
+    one forward pass and classified in one matrix product, then looked up and retrieved."""
+    plans = [_rule_plan(query, timer) for query, timer in zip(queries, timers)]
+    pending = [i for i, plan in enumerate(plans) if plan is None]
+    if pending:
+        pending_timers = [timers[i] for i in pending]
+        with shared_span(pending_timers, "embedding"):
+            vectors = _get_embeddings().embed_documents([queries[i] for i in pending])
+        with shared_span(pending_timers, "intent"):
+            intents = _get_intent_classifier().classify_many(vectors)
+        for i, query_vector, intent in zip(pending, vectors, intents):
+            plans[i] = _plan_embedded(queries[i], query_vector, intent, timers[i])
+
+    for plan, timer in zip(plans, timers):
+        timer.set_branch(plan["branch"])
+    return plans
+
+
+# 🌊 Streaming variant: yields answer text chunks as the LLM produces them
+def stream_query(query: str, timer: StageTimer = None):
+    timer = timer or StageTimer()
+    plan = _plan_query(query, timer)
+    timer.set_branch(plan["branch"])
+
+    if plan["response"] is not None:
+        yield plan["response"]
+        return
+
+    with timer.span("prompt_assembly"):
+        prompt = PROMPT.format(context=_format_context(plan["docs"], plan["query_vector"]), question=query)
+
+    # The span covers generation only, not time the client takes to read each chunk
+    parts = []
+    chunks = iter(_get_llm().stream(prompt))
+    while True:
+        with timer.span("llm", observe=False):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+    timer.observe("llm")
+
+    _remember(query, plan, "".join(parts).strip())
+
+
+# -------------------------
+# 🔥 Warm-up & readiness
+# -------------------------
+
+_warmup_state = {"started": False, "error": None}
+
+
+def warm_up():
+    """Load every heavy component and run one embedding so the first query is not cold."""
+    _warmup_state["started"] = True
+    try:
+        _get_rule_engine()
+        _get_embeddings().embed_query("warm up")
+        _get_intent_classifier()
+        _get_context_assembler().precompute(str(doc["page_content"]) for doc in iter_rule_docs(DATA_DIR))
+        _get_vectorstore()
+        if HYBRID_ENABLED:
+            _get_bm25_index()
+        _get_query_analyzer()
+        _get_llm()
+        _warmup_state["error"] = None
+    except Exception as e:
+        _warmup_state["error"] = f"{type(e).__name__}: {e}"
+        raise
+
+
+def pipeline_status() -> dict:
+    """Which components are loaded; retrieval + llm both true means ready to serve."""
+    retrieval = bool(_get_embeddings.cache_info().currsize and _get_vectorstore.cache_info().currsize)
+    llm = bool(_get_llm.cache_info().currsize)
+    return {
+        "ready": retrieval and llm,
+        "retrieval": retrieval,
+        "llm": llm,
+        "warmup_started": _warmup_state["started"],
+        "error": _warmup_state["error"],
+    }
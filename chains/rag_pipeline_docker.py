@@ -6,31 +6,50 @@
 import os
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
 from langchain_qdrant import QdrantVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
-from qdrant_client import QdrantClient
+from chains.clients import GROQ_TIMEOUT, groq_http_client, make_qdrant_client
+from chains.numpy_vectorstore import NumpyVectorStore, iter_rule_docs
+from chains.embedding_artifact import artifact_exists, artifact_in_query_space
+from chains.embedding_backend import embedding_backend, load_embeddings
+from chains.intent_classifier import DOMAIN_LABEL, load_or_build_intent_classifier
+from chains.context_assembler import ContextAssembler, answer_token_cap
 from langchain_groq import ChatGroq
 from langchain.schema.runnable import Runnable
-from langchain.chains import LLMChain
 
 # Load environment variables
 load_dotenv()
 os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
 
-# Connect to Qdrant
-client = QdrantClient(host="localhost", port=6333)
+# Initialize embeddings (EMBEDDING_BACKEND=torch|onnx|onnx-int8, same as ingestion)
+embeddings = load_embeddings()
 
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-# Initialize vectorstore
-vectorstore = QdrantVectorStore(
-    client=client,
-    collection_name="vaasthu_rules",
-    embedding=embeddings,
+# 🗄️ Retrieval backend: "qdrant" (docker) or "numpy" (in-process, no network hop)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+DATA_DIR = os.getenv(
+    "VAASTHU_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "data_for_qdrant"),
+)
+ARTIFACT_DIR = os.getenv(
+    "VAASTHU_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "embedding_artifact"),
 )
 
+if VECTOR_BACKEND == "numpy":
+    # Prefer the ingestion artifact (mmap, no re-embedding); else embed the JSON once
+    if artifact_exists(ARTIFACT_DIR):
+        vectorstore = NumpyVectorStore.from_artifact(ARTIFACT_DIR, embeddings, backend=embedding_backend())
+    else:
+        vectorstore = NumpyVectorStore.from_json_dir(DATA_DIR, embeddings)
+else:
+    # Connect to Qdrant
+    client = make_qdrant_client(host="localhost", port=6333)
+
+    vectorstore = QdrantVectorStore(
+        client=client,
+        collection_name="vaasthu_rules",
+        embedding=embeddings,
+    )
+
 # Prompt template for RAG (Vaasthu-specific)
 template = """
 You are VaasthuGPT™, an expert in Vaasthu Shastra. 
@@ -57,89 +76,77 @@ PROMPT = PromptTemplate(
     template=template,
 )
 
-# Groq LLM (for both RAG and fallback)
+# ✂️ Token budgets (same as rag_pipeline.py): the prompt asks for a 2-4 line answer,
+# so the output cap follows from that
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", str(answer_token_cap(4))))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "300"))  # estimated tokens of rule context per prompt
+
+# Groq LLM for RAG answers
 llm = ChatGroq(
     model_name="llama3-8b-8192",
     temperature=0.5,
     model_kwargs={"top_p": 0.85},
-    max_tokens=1024,
+    max_tokens=ANSWER_MAX_TOKENS,
+    request_timeout=GROQ_TIMEOUT,
+    http_client=groq_http_client(),
 )
 
-# Build RetrievalQA chain
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 3}),
-    chain_type="stuff",
-    chain_type_kwargs={"prompt": PROMPT},
-    return_source_documents=True,
+# 📖 Prompt context: the retrieved rules' most query-relevant sentences within CONTEXT_TOKEN_BUDGET.
+# Corpus sentence vectors come from the ingestion artifact; whatever is missing is embedded now,
+# so a query never pays a forward pass for them
+context_assembler = ContextAssembler(embeddings, max_tokens=CONTEXT_TOKEN_BUDGET)
+if artifact_in_query_space(ARTIFACT_DIR, embeddings, embedding_backend()):
+    context_assembler.load(ARTIFACT_DIR)
+context_assembler.precompute(str(doc["page_content"]) for doc in iter_rule_docs(DATA_DIR))
+
+# 🧭 Routing: the local intent classifier from rag_pipeline.py. Greetings and off-topic
+# messages get a templated reply (no LLM call); the centroids come from the ingestion
+# artifact and are trained here only when it is missing or stale.
+INTENT_EXAMPLES_FILE = os.getenv(
+    "VAASTHU_INTENT_EXAMPLES",
+    os.path.join(os.path.dirname(__file__), "..", "Data", "intent_examples.json"),
+)
+intent_classifier = load_or_build_intent_classifier(
+    embeddings, iter_rule_docs(DATA_DIR), INTENT_EXAMPLES_FILE, ARTIFACT_DIR, embedding_backend()
 )
 
-# Fallback prompt for irrelevant input
-fallback_prompt = PromptTemplate.from_template("""
-You are a friendly assistant. Reply naturally to casual or random messages like greetings, small talk, or gibberish.
+# 🔎 Number of rules retrieved for the prompt
+TOP_K = 3
 
-Do NOT answer any Vaasthu or architecture related question. Just say: "Sorry, I can answer Vaasthu-related questions."
 
-User: {query}
-AI:""")
+def _format_context(docs, query_vector=None) -> str:
+    """The retrieved rules' most query-relevant sentences, markup stripped, within CONTEXT_TOKEN_BUDGET."""
+    return context_assembler.assemble(docs, query_vector)
 
-fallback_chain = LLMChain(llm=llm, prompt=fallback_prompt)
 
-# 🔐 Critical Vaasthu keywords to force RAG routing
-CRITICAL_KEYWORDS = [
-    "bedroom", "master bedroom", "children bedroom", "guest bedroom",
-    "kitchen", "living room", "dining room", "study room", "pooja room", "store room",
-    "bathroom", "toilet", "septic tank", "water tank", "borewell",
-    "stairs", "staircase", "balcony", "veranda", "terrace",
-    "entrance", "main door", "entry", "exit",
-    "placement", "located", "positioned", "direction", "facing",
-    "north", "south", "east", "west", 
-    "northeast", "northwest", "southeast", "southwest", "center", "brahmasthan"
-]
+def _answer_from_docs(query: str, docs, query_vector=None) -> str:
+    """Fill the RAG prompt with already-retrieved docs (no second retrieval) and ask the LLM."""
+    prompt = PROMPT.format(context=_format_context(docs, query_vector), question=query)
+    return llm.invoke(prompt).content.strip()
 
-# 📊 Confidence thresholds
-HIGH_CONFIDENCE = 0.78
-LOW_CONFIDENCE = 0.60
 
 # ✅ Final routing function
 def route_query(query: str) -> dict:
-    query_lower = query.lower()
+    # One embedding, reused for routing and for the search
+    query_vector = embeddings.embed_query(query)
+    intent = intent_classifier.classify(query_vector)
 
-    # Keyword override check
-    if any(kw in query_lower for kw in CRITICAL_KEYWORDS):
-        result = qa_chain.invoke({"query": query})
+    # Greetings and off-topic messages get their templated reply
+    if intent.label != DOMAIN_LABEL:
         return {
             "query": query.strip(),
-            "response": result["result"].strip()
+            "response": intent.response or "Sorry, I can answer Vaasthu-related questions."
         }
 
-    # Run similarity search manually to get score
-    docs_and_scores = vectorstore.similarity_search_with_score(query, k=1)
-
-    if not docs_and_scores:
+    docs = vectorstore.similarity_search_by_vector(query_vector, k=TOP_K)
+    if not docs:
         # No match found at all
         return {
             "query": query.strip(),
             "response": "Sorry, I have no idea about the query you asked."
         }
 
-    top_doc, top_score = docs_and_scores[0]
-
-    if top_score >= HIGH_CONFIDENCE:
-        result = qa_chain.invoke({"query": query})
-        return {
-            "query": query.strip(),
-            "response": result["result"].strip()
-        }
-    elif top_score >= LOW_CONFIDENCE:
-        return {
-            "query": query.strip(),
-            "response": "❌Sorry, I have no idea about the query you asked."
-        }
-    else:
-        # Handle irrelevant/casual input
-        fallback = fallback_chain.invoke({"query": query})
-        return {
-            "query": query.strip(),
-            "response": fallback["text"].strip()
-        }
+    return {
+        "query": query.strip(),
+        "response": _answer_from_docs(query, docs, query_vector)
+    }
@@ -8,23 +8,22 @@ from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
 from langchain_qdrant import QdrantVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
-from qdrant_client import QdrantClient
 from langchain_groq import ChatGroq
-from langchain.chains import LLMChain
+from chains.clients import GROQ_TIMEOUT, groq_http_client, make_qdrant_client
+from chains.embedding_backend import embedding_backend, load_embeddings
+from chains.intent_classifier import DOMAIN_LABEL, load_or_build_intent_classifier
+from chains.numpy_vectorstore import iter_rule_docs
+from chains.context_assembler import answer_token_cap
 
 # Load environment variables
 load_dotenv()
 os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
 
-# Connect to qdrant cloud
-client = QdrantClient(
-    url=os.getenv("QDRANT_URL"),
-    api_key=os.getenv("QDRANT_API_KEY")
-)
+# Connect to qdrant cloud (pooled, kept-alive connections)
+client = make_qdrant_client()
 
-# Initialize embeddings
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# Initialize embeddings (EMBEDDING_BACKEND=torch|onnx|onnx-int8, same as ingestion)
+embeddings = load_embeddings()
 
 # Initialize vectorstore
 vectorstore = QdrantVectorStore(
@@ -59,13 +58,18 @@ PROMPT = PromptTemplate(
     template=template,
 )
 
-# Groq LLM (for both RAG and fallback)
+# ✂️ The prompt asks for a 2-4 line answer, so cap the output tokens to match
+ANSWER_MAX_TOKENS = int(os.getenv("ANSWER_MAX_TOKENS", str(answer_token_cap(4))))
+
+# Groq LLM for RAG answers
 llm = ChatGroq(
     model_name="llama3-8b-8192",
     temperature=0.5,
     model_kwargs={"top_p": 0.85},
-    max_tokens=1024,
-    api_key=os.getenv("GROQ_API_KEY")
+    max_tokens=ANSWER_MAX_TOKENS,
+    api_key=os.getenv("GROQ_API_KEY"),
+    request_timeout=GROQ_TIMEOUT,
+    http_client=groq_http_client(),
 )
 
 # Build RetrievalQA chain
@@ -77,32 +81,18 @@ qa_chain = RetrievalQA.from_chain_type(
     return_source_documents=True,
 )
 
-# Fallback prompt for irrelevant input
-fallback_prompt = PromptTemplate.from_template("""
-You are a friendly assistant. Reply naturally to casual or random messages like greetings, small talk, or gibberish.
-
-Do NOT answer any Vaasthu or architecture related question. Just say: "Sorry, I can answer Vaasthu-related questions."
-
-User: {query}
-AI:""")
-
-fallback_chain = LLMChain(llm=llm, prompt=fallback_prompt)
-
-# 🔐 Critical Vaasthu keywords to force RAG routing
-CRITICAL_KEYWORDS = [
-    "bedroom", "master bedroom", "children bedroom", "guest bedroom",
-    "kitchen", "living room", "dining room", "study room", "pooja room", "store room",
-    "bathroom", "toilet", "septic tank", "water tank", "borewell",
-    "stairs", "staircase", "balcony", "veranda", "terrace",
-    "entrance", "main door", "entry", "exit",
-    "placement", "located", "positioned", "direction", "facing",
-    "north", "south", "east", "west", 
-    "northeast", "northwest", "southeast", "southwest", "center", "brahmasthan"
-]
-
-# 📊 Confidence thresholds
-# HIGH_CONFIDENCE = 0.78
-# LOW_CONFIDENCE = 0.60
+# 🧭 Local intent classifier (same centroids as rag_pipeline.py): greetings and
+# off-topic messages get a templated reply instead of an LLM call.
+# Loaded from the ingestion artifact; trained here only when it is missing or stale.
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "Data")
+ARTIFACT_DIR = os.getenv("VAASTHU_ARTIFACT_DIR", os.path.join(DATA_DIR, "embedding_artifact"))
+intent_classifier = load_or_build_intent_classifier(
+    embeddings,
+    iter_rule_docs(os.path.join(DATA_DIR, "data_for_qdrant")),
+    os.path.join(DATA_DIR, "intent_examples.json"),
+    ARTIFACT_DIR,
+    embedding_backend(),
+)
 
 # ✅ Final routing function (compatible with Ragas)
 def _documents_to_texts(docs):
@@ -114,6 +104,14 @@ def _documents_to_texts(docs):
     return texts
 
 
+def _answer_from_docs(query, docs):
+    """Helper: run the "stuff" prompt on already-retrieved docs (no second retrieval)."""
+    result = qa_chain.combine_documents_chain.invoke(
+        {"input_documents": docs, "question": query}
+    )
+    return result["output_text"]
+
+
 def route_query(query: str) -> dict:
     """
     Return a dict compatible with Ragas:
@@ -123,81 +121,28 @@ def route_query(query: str) -> dict:
         "contexts": ["doc1 text", "doc2 text", ...]
       }
 
-    Uses Qdrant distance scores (lower = better).
+    The query is embedded once; the same vector routes it and feeds the search.
     """
     query = (query or "").strip()
-    query_lower = query.lower()
 
-    # Fast path override (keywords always go to QA chain)
-    if any(kw in query_lower for kw in CRITICAL_KEYWORDS):
-        try:
-            result = qa_chain.invoke({"query": query})
-        except Exception as e:
-            return {"question": query, "answer": f"Error: {e}", "contexts": []}
+    query_vector = embeddings.embed_query(query)
+    intent = intent_classifier.classify(query_vector)
+    if intent.label != DOMAIN_LABEL:
+        return {"question": query, "answer": intent.response, "contexts": []}
 
-        contexts = []
-        if isinstance(result, dict):
-            src_docs = result.get("source_documents", [])
-            contexts = _documents_to_texts(src_docs)
-            answer = result.get("result") or result.get("answer") or ""
-        else:
-            answer = str(result)
-
-        return {"question": query, "answer": answer.strip(), "contexts": contexts or []}
-
-    # Retrieve docs with similarity scores
-    docs_and_scores = vectorstore.similarity_search_with_score(query, k=3)
-
-    if not docs_and_scores:
+    # Retrieve docs; the same docs feed the answer and the Ragas contexts
+    docs = vectorstore.similarity_search_by_vector(query_vector, k=3)
+    contexts = _documents_to_texts(docs)
+    if not docs:
         return {
             "question": query,
             "answer": "❌ Sorry, I have no idea about the query you asked.",
             "contexts": [],
         }
 
-    docs = [item[0] for item in docs_and_scores]
-    scores = [item[1] for item in docs_and_scores]
-    contexts = _documents_to_texts(docs)
-
-    # Take top doc score (lower = better similarity in Qdrant)
-    top_doc, top_score = docs_and_scores[0]
-
-    # Thresholds (tune based on testing)
-    HIGH_CONFIDENCE = 0.25   # very close match
-    LOW_CONFIDENCE = 0.55    # somewhat related, but risky
-
-    if top_score <= HIGH_CONFIDENCE:
-        # Confident: run QA chain
-        try:
-            result = qa_chain.invoke({"query": query})
-        except Exception as e:
-            return {"question": query, "answer": f"Error: {e}", "contexts": contexts}
-
-        if isinstance(result, dict):
-            answer = result.get("result") or result.get("answer") or ""
-            src_docs = result.get("source_documents", [])
-            src_texts = _documents_to_texts(src_docs)
-            final_contexts = src_texts or contexts
-        else:
-            answer = str(result)
-            final_contexts = contexts
-
-        return {"question": query, "answer": answer.strip(), "contexts": final_contexts}
-
-    elif top_score <= LOW_CONFIDENCE:
-        # Somewhat related, but unsure → "don't know"
-        return {
-            "question": query,
-            "answer": "❌ Sorry, I’m not confident enough to answer this question.",
-            "contexts": contexts,
-        }
-
-    else:
-        # Too far → fallback chain (chitchat, smalltalk)
-        fallback = fallback_chain.invoke({"query": query})
-        if isinstance(fallback, dict):
-            fallback_text = fallback.get("text") or fallback.get("result") or ""
-        else:
-            fallback_text = str(fallback)
+    try:
+        answer = _answer_from_docs(query, docs)
+    except Exception as e:
+        return {"question": query, "answer": f"Error: {e}", "contexts": contexts}
 
-        return {"question": query, "answer": fallback_text.strip(), "contexts": []}
+    return {"question": query, "answer": answer.strip(), "contexts": contexts}
@@ -0,0 +1,99 @@
+# Token-bucket rate limiting for calls to the LLM provider (Groq).
+# Groq quotas are expressed per minute in both requests (RPM) and tokens (TPM), so
+# a call has to take one request and its estimated tokens from two buckets.
+# Buckets refill continuously; callers wait exactly as long as the quota requires
+# instead of sleeping a fixed amount.
+
+import asyncio
+import random
+import time
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """Continuous-refill token bucket: `rate_per_minute` tokens/minute, bursts up to `capacity`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available, then take them (FIFO via the lock)."""
+        amount = min(amount, self.capacity)  # an oversized request still gets through eventually
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Correct an earlier estimate once actual usage is known (may go negative = debt)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider answered 429 despite our accounting."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits; a limit <= 0 disables it."""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = AsyncTokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = AsyncTokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    async def acquire(self, estimated_tokens: int):
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        if self.tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def throttle(self):
+        """Provider said 429: stop everyone until the buckets refill."""
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain()
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return max(1, sum(len(text or "") for text in texts) // 4)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for HTTP 429 / rate-limit errors from groq, httpx or a wrapped message."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "rate_limit" in message
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The provider's Retry-After hint, when the error carries a response."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for retry `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
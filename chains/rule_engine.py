@@ -0,0 +1,235 @@
+# Deterministic rule engine over the structured Vaasthu records in Data/json_data_format.
+# Each record already states ideal_direction, direction_priority and prohibited_directions,
+# so simple placement questions ("which direction for the pooja room?", "is northeast good
+# for the master bedroom?") are answered from an in-memory index in microseconds.
+# Anything open-ended (why / remedies / adjacency / sizes ...) returns None -> RAG handles it.
+# Records that disagree with themselves (ideal_direction vs direction_priority[0]) or with the
+# rule corpus RAG answers from are skipped, so both paths give the same answer.
+
+import os
+import re
+import json
+from typing import Dict, Iterable, List, Optional
+
+from chains.query_analyzer import DIRECTION_PATTERN, ZONE_SYNONYMS, canonical_direction, category_intent
+
+# Extra names people use for an element, keyed by the record's "element" value
+ELEMENT_SYNONYMS = {
+    "kitchen": ["cooking area"],
+    "master bedroom": ["main bedroom"],
+    "children bedroom": ["children's bedroom", "childrens bedroom", "children room", "kids bedroom", "kids room", "child bedroom"],
+    "guest bedroom": ["guest room"],
+    "living room": ["drawing room", "hall"],
+    "pooja room": ["puja room", "prayer room", "pooja", "puja", "mandir"],
+    "bathroom": ["toilet", "washroom", "restroom"],
+    "dining room": ["dining area", "dining hall"],
+    "study room": ["study"],
+    "home office": ["office room", "work room"],
+    "store room": ["storeroom", "storage room"],
+    "main door": ["main entrance", "entrance door", "front door", "main entry"],
+    "staircase": ["stairs", "stair case", "stairway"],
+    "septic tank": ["septic"],
+    "underground water tank": ["underground tank", "sump"],
+    "overhead water tank": ["overhead tank"],
+    "garden_green_zone": ["garden", "lawn", "green zone"],
+    "Brahmasthan (central zone)": ["brahmasthan", "central zone"],
+}
+
+# Questions that need explanation rather than a lookup
+_OPEN_ENDED = re.compile(
+    r"\b(why|how|remed\w*|what if|fix\w*|correct\w*|cure|above|below|under|beneath|adjacent|"
+    r"next to|beside|near|size|dimension\w*|colou?r\w*|height|shape|slope|already|existing)\b"
+)
+# Anything else the question is about: an object inside the room, or which way to face / sleep.
+# "Where should the stove be in the kitchen?" is not asking where the kitchen goes.
+_OTHER_SUBJECT = re.compile(
+    r"\b(stoves?|burners?|gas|cylinders?|hobs?|ovens?|microwaves?|fridges?|refrigerators?|sinks?|taps?|"
+    r"platforms?|counters?|slabs?|beds?|cots?|pillows?|head|sleep\w*|lockers?|safes?|almirahs?|cupboards?|"
+    r"wardrobes?|cabinets?|shel(?:f|ves)|racks?|desks?|tables?|chairs?|sofas?|seats?|commodes?|showers?|"
+    r"geysers?|mirrors?|idols?|photos?|pictures?|paintings?|clocks?|tv|television|aquariums?|plants?|"
+    r"tulsi|dustbins?|doors?|windows?|walls?|floors?|roofs?|ceilings?|furniture|"
+    r"fac(?:e|es|ed|ing)|cook(?:ing)?|study(?:ing)?|pray(?:ing)?|work(?:ing)?|sit(?:ting)?|point\w*)\b"
+)
+_PROHIBITED_INTENT = re.compile(
+    r"\b(avoid\w*|prohibit\w*|forbidden|should not|shouldn't|must not|never|wrong|bad|inauspicious)\b"
+)
+_PLACEMENT_INTENT = re.compile(
+    r"\b(where|directions?|locat\w*|place|placed|placement|position\w*|put|build|keep|zone)\b"
+)
+_CHECK_INTENT = re.compile(
+    r"\b(is|are|can|could|should|shall|may|good|ok|okay|fine|allowed|suitable|auspicious)\b"
+)
+
+
+def _element_names(element: str) -> List[str]:
+    """'veranda / sit-out' -> ['veranda', 'sit-out']; 'garden_green_zone' -> ['garden green zone']."""
+    base = re.sub(r"\(.*?\)", "", element).replace("_", " ").lower()
+    names = [name.strip() for name in base.split("/") if name.strip()]
+    names += [name.lower() for name in ELEMENT_SYNONYMS.get(element, [])]
+    return names
+
+
+def _element_zone(element: str) -> Optional[str]:
+    """Corpus zone tag for a record's element, by its longest matching zone synonym."""
+    best, best_len = None, 0
+    for name in _element_names(element):
+        for zone, synonyms in ZONE_SYNONYMS.items():
+            for synonym in synonyms:
+                if len(synonym) > best_len and re.search(r"\b" + re.escape(synonym) + r"\b", name):
+                    best, best_len = zone, len(synonym)
+    return best
+
+
+def corpus_ideal_directions(corpus: Iterable[dict]) -> Dict[str, set]:
+    """zone -> the first direction each of its placement rules names (the corpus's ideal)."""
+    ideals: Dict[str, set] = {}
+    for rule in corpus:
+        metadata = rule.get("metadata", {})
+        if category_intent(str(metadata.get("category", ""))) != "placement":
+            continue
+        body = str(rule["page_content"]).split(":", 1)[-1].lower()  # skip the title
+        first = DIRECTION_PATTERN.search(body)
+        if first:
+            ideals.setdefault(str(metadata.get("zone", "")), set()).add(canonical_direction(first.group(0)))
+    return ideals
+
+
+def _display_direction(direction: str) -> str:
+    return "the center of the house" if direction == "center" else f"the {direction}"
+
+
+def _join(items: List[str], conjunction: str = "or") -> str:
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + f" {conjunction} " + items[-1]
+
+
+class RuleEngine:
+    """Element-synonym -> record index with allowed/prohibited direction sets."""
+
+    def __init__(self, records: List[dict], corpus: Optional[Iterable[dict]] = None):
+        # corpus: the RAG rule docs ({"page_content", "metadata"}); records that contradict them are skipped
+        self._rules: List[dict] = []
+        names: Dict[str, Optional[int]] = {}
+        corpus_ideals = corpus_ideal_directions(corpus) if corpus is not None else {}
+
+        for record in records:
+            rule = self._rule_from_record(record, corpus_ideals)
+            if rule is not None:
+                self._rules.append(rule)
+            # Skipped records keep their names, so a question naming them still falls through
+            for name in _element_names(record["element"]):
+                names.setdefault(name, len(self._rules) - 1 if rule is not None else None)
+
+        self._names = names
+        # Longest names first so "master bedroom" wins over shorter overlaps
+        alternatives = sorted(names, key=len, reverse=True)
+        self._element_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(name) for name in alternatives) + r")\b"
+        ) if alternatives else None
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @staticmethod
+    def _rule_from_record(record: dict, corpus_ideals: Dict[str, set]) -> Optional[dict]:
+        ideal = canonical_direction(str(record.get("ideal_direction", "")))
+        if ideal is None:
+            return None  # prose directions ("corners and periphery") are left to RAG
+
+        # direction_priority in its stated order; qualified entries ("south (without shading)") are skipped
+        priority = [canonical_direction(str(d)) for d in record.get("direction_priority", [])]
+        prohibited = [canonical_direction(str(d)) for d in record.get("prohibited_directions", [])]
+        allowed = list(dict.fromkeys(d for d in priority if d))
+        prohibited = [d for d in prohibited if d]
+
+        if not allowed or allowed[0] != ideal:
+            return None  # ideal_direction disagrees with direction_priority; let RAG answer
+        if set(allowed) & set(prohibited):
+            return None  # contradictory record; let RAG explain it
+        if corpus_ideals.get(_element_zone(record["element"]), {ideal}) != {ideal}:
+            return None  # the rule corpus names another ideal direction
+
+        return {
+            "name": _element_names(record["element"])[0],
+            "ideal": ideal,
+            "allowed": allowed,
+            "prohibited": prohibited,
+            "severity": record.get("severity"),
+        }
+
+    @classmethod
+    def from_json_dir(cls, json_dir: str, corpus: Optional[Iterable[dict]] = None) -> "RuleEngine":
+        records = []
+        for file in sorted(os.listdir(json_dir)):
+            if file.endswith(".json"):
+                with open(os.path.join(json_dir, file), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                records.extend(data if isinstance(data, list) else [data])
+        return cls([record for record in records if isinstance(record, dict) and record.get("element")], corpus)
+
+    def answer(self, query: str) -> Optional[str]:
+        """Answer an exact-match placement question, or return None to fall back to RAG."""
+        if self._element_pattern is None:
+            return None
+
+        text = query.lower()
+        if _OPEN_ENDED.search(text):
+            return None
+
+        matches = list(self._element_pattern.finditer(text))
+        matched = {self._names[m.group(1)] for m in matches}
+        if len(matched) != 1 or None in matched:
+            return None
+        rule = self._rules[matched.pop()]
+
+        # Only the element and a direction may be named; the element's own words don't count
+        rest = self._element_pattern.sub(" ", text)
+        if _OTHER_SUBJECT.search(rest):
+            return None
+
+        directions = {canonical_direction(m.group(0)) for m in DIRECTION_PATTERN.finditer(text)}
+        # "brahmasthan" in the element name is not a direction being asked about
+        if rule["ideal"] == "center" and "brahmasthan" in text:
+            directions.discard("center")
+
+        if len(directions) == 1 and _CHECK_INTENT.search(text):
+            return self._check_answer(rule, directions.pop())
+        if directions:
+            return None
+        if _PROHIBITED_INTENT.search(text):
+            return self._prohibited_answer(rule)
+        if _PLACEMENT_INTENT.search(text):
+            return self._placement_answer(rule)
+        return None
+
+    def _placement_answer(self, rule: dict) -> str:
+        lines = [f"As per Vaasthu, the {rule['name']} is best placed in {_display_direction(rule['ideal'])}."]
+        alternatives = [_display_direction(d) for d in rule["allowed"][1:]]
+        if alternatives:
+            lines.append(f"If that is not possible, {_join(alternatives)} is the next best choice.")
+        if rule["prohibited"]:
+            lines.append(f"Avoid {_join([_display_direction(d) for d in rule['prohibited']], 'and')}.")
+        return " ".join(lines)
+
+    def _prohibited_answer(self, rule: dict) -> str:
+        if not rule["prohibited"]:
+            return (f"No direction is strictly prohibited for the {rule['name']}; "
+                    f"{_display_direction(rule['ideal'])} is ideal.")
+        severity = f" ({rule['severity']} severity)" if rule.get("severity") else ""
+        return (f"As per Vaasthu, the {rule['name']} must not be placed in "
+                f"{_join([_display_direction(d) for d in rule['prohibited']], 'and')}{severity}. "
+                f"The ideal direction is {rule['ideal']}.")
+
+    def _check_answer(self, rule: dict, direction: str) -> str:
+        if direction == rule["ideal"]:
+            return f"Yes. {_display_direction(direction).capitalize()} is the ideal direction for the {rule['name']} as per Vaasthu."
+        if direction in rule["allowed"]:
+            return (f"Yes, {_display_direction(direction)} is an acceptable direction for the {rule['name']}, "
+                    f"though {_display_direction(rule['ideal'])} is ideal.")
+        if direction in rule["prohibited"]:
+            return (f"No. {_display_direction(direction).capitalize()} should be avoided for the {rule['name']} as per Vaasthu. "
+                    f"Prefer {_join([_display_direction(d) for d in rule['allowed']])}.")
+        return (f"{_display_direction(direction).capitalize()} is not a recommended direction for the {rule['name']}. "
+                f"The ideal direction is {rule['ideal']}"
+                + (f", followed by {_join(rule['allowed'][1:])}." if len(rule["allowed"]) > 1 else "."))
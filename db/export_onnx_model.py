@@ -0,0 +1,109 @@
+# File: db/export_onnx_model.py
+
+# One-off export of all-MiniLM-L6-v2 to ONNX for EMBEDDING_BACKEND=onnx / onnx-int8.
+# Needs torch + transformers (the ingestion environment); serving then only needs
+# onnxruntime + tokenizers.
+#
+#   python db/export_onnx_model.py          # models/all-MiniLM-L6-v2-onnx/model.onnx + tokenizer.json
+#   python db/export_onnx_model.py --int8   # also model.int8.onnx (dynamic int8 weight quantization)
+
+import os
+import sys
+
+import numpy as np
+
+# Allow `python db/export_onnx_model.py` from the repo root to import chains.*
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chains.embedding_backend import EMBEDDING_MODEL, ONNX_MODEL_DIR
+from chains.onnx_embeddings import ONNX_FILES, OnnxEmbeddings
+
+HF_MODEL_ID = f"sentence-transformers/{EMBEDDING_MODEL}"
+OPSET = 14
+
+# Sentences used to check the export against the PyTorch model
+CHECK_SENTENCES = [
+    "Where should the kitchen be located?",
+    "The pooja room is best placed in the northeast corner of the house.",
+    "hello",
+]
+
+def export_fp32(out_dir):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    print(f"📦 Exporting {HF_MODEL_ID} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_ID)
+    model = AutoModel.from_pretrained(HF_MODEL_ID).eval()
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Return last_hidden_state only; pooling happens in OnnxEmbeddings."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    dummy = tokenizer(CHECK_SENTENCES, padding=True, return_tensors="pt")
+    model_path = os.path.join(out_dir, ONNX_FILES["onnx"])
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(model),
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            model_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "token_embeddings": dynamic,
+            },
+            opset_version=OPSET,
+        )
+
+    # tokenizer.json is all OnnxEmbeddings needs to tokenize exactly like the original
+    tokenizer.save_pretrained(out_dir)
+    print(f"✅ Wrote {model_path} ({os.path.getsize(model_path) / 1e6:.1f} MB)")
+
+def export_int8(out_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = os.path.join(out_dir, ONNX_FILES["onnx"])
+    dst = os.path.join(out_dir, ONNX_FILES["onnx-int8"])
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    print(f"✅ Wrote {dst} ({os.path.getsize(dst) / 1e6:.1f} MB)")
+
+def compare_with_torch(out_dir, backends):
+    """Cosine similarity of each ONNX backend's vectors to the PyTorch model's"""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    reference = np.asarray(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL).embed_documents(CHECK_SENTENCES))
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    for backend in backends:
+        vectors = np.asarray(OnnxEmbeddings(out_dir, backend=backend).embed_documents(CHECK_SENTENCES))
+        cosine = (reference * vectors).sum(axis=1)
+        print(f"🔍 {backend}: min cosine vs torch = {cosine.min():.6f}")
+
+def main():
+    out_dir = ONNX_MODEL_DIR
+    os.makedirs(out_dir, exist_ok=True)
+
+    export_fp32(out_dir)
+    backends = ["onnx"]
+    if "--int8" in sys.argv:
+        export_int8(out_dir)
+        backends.append("onnx-int8")
+
+    compare_with_torch(out_dir, backends)
+    print("✅ Export complete. Serve with EMBEDDING_BACKEND=" + " or ".join(backends) +
+          "; onnx-int8 needs its own ingestion run (EMBEDDING_BACKEND=onnx-int8 python db/qdrant_setup.py)")
+
+if __name__ == "__main__":
+    main()
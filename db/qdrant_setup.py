@@ -3,194 +3,479 @@
 # Use this file when qdrant cloud is used.
 
 import os
+import sys
 import json
-from qdrant_client import QdrantClient
-from langchain_qdrant import Qdrant
-from langchain_huggingface import HuggingFaceEmbeddings
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client.models import Distance, PayloadSchemaType, PointIdsList, PointStruct, VectorParams
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Allow `python db/qdrant_setup.py` from the repo root to import chains.*
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chains.embedding_artifact import (
+    artifact_exists,
+    content_hash,
+    load_artifact,
+    read_manifest,
+    rule_point_id,
+    write_artifact,
+)
+from chains.embedding_backend import (
+    EMBEDDING_MODEL,
+    backends_compatible,
+    embedding_backend,
+    load_embeddings,
+)
+from chains.clients import make_qdrant_client
+from chains.lexical_index import BM25Index
+from chains.context_assembler import ContextAssembler
+from chains.intent_classifier import build_intent_classifier, examples_hash
+
 DATA_DIR = "Data/data_for_qdrant"
 COLLECTION_NAME = "vaasthu_rules"
+EMBEDDING_BACKEND = embedding_backend()  # torch | onnx | onnx-int8, recorded with the vectors
+
+# Local embedding artifact served by the in-process (VECTOR_BACKEND=numpy) retriever
+ARTIFACT_DIR = "Data/embedding_artifact"
+ARTIFACT_DTYPE = os.getenv("ARTIFACT_DTYPE", "float32")  # or float16 to halve the file
 
 QDRANT_URL = os.getenv("QDRANT_URL")
 API_KEY = os.getenv("QDRANT_API_KEY")
 
-BATCH_SIZE = 20  # Reduced batch size for better handling
+# Small-talk / off-topic examples the routing classifier is trained on (with the rule corpus)
+INTENT_EXAMPLES_FILE = "Data/intent_examples.json"
+
+# Rule tags the pipeline filters on (chains/query_analyzer.py)
+PAYLOAD_INDEX_FIELDS = ("zone", "rule_id", "category")
+
+BATCH_SIZE = 20  # Points per upsert request
 TIMEOUT = 300    # 5 minutes timeout
 
+# Ingestion pipeline: embed on the main thread while workers upsert earlier batches
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))        # texts per forward pass
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))             # concurrent upserts
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv("UPLOAD_MAX_IN_FLIGHT", "8"))  # queued + running batches
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "5"))             # attempts per batch
+RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "1.0"))    # seconds, doubled per retry
+
 def load_data(data_dir):
-    """Load data from JSON files in the specified directory"""
-    docs = []
+    """Yield documents one at a time from the JSON Lines (or legacy JSON) files in data_dir"""
     if not os.path.exists(data_dir):
         print(f"❌ Data directory not found: {data_dir}")
-        return docs
-        
-    for file in os.listdir(data_dir):
-        if file.endswith(".json"):
-            file_path = os.path.join(data_dir, file)
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
+        return
+
+    total = 0
+    for file in sorted(os.listdir(data_dir)):
+        if not file.endswith((".jsonl", ".json")):
+            continue
+        file_path = os.path.join(data_dir, file)
+        count = 0
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                if file.endswith(".jsonl"):
+                    for line_no, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        try:
+                            doc = json.loads(line)
+                        except json.JSONDecodeError as e:
+                            print(f"❌ {file}:{line_no}: {e}")
+                            continue
+                        count += 1
+                        yield doc
+                else:
                     data = json.load(f)
-                    if isinstance(data, list):
-                        docs.extend(data)
-                    else:
-                        docs.append(data)
-                print(f"✅ Loaded {file}")
-            except Exception as e:
-                print(f"❌ Error loading {file}: {e}")
-    
-    print(f"📚 Total documents loaded: {len(docs)}")
-    return docs
+                    for doc in (data if isinstance(data, list) else [data]):
+                        count += 1
+                        yield doc
+            print(f"✅ Loaded {file} ({count} documents)")
+        except Exception as e:
+            print(f"❌ Error loading {file}: {e}")
+        total += count
+
+    print(f"📚 Total documents loaded: {total}")
+
+def rule_text_and_metadata(doc):
+    """(text, metadata) for one loaded document"""
+    if isinstance(doc, dict):
+        # Handle different document structures
+        if "page_content" in doc:
+            return str(doc["page_content"]), doc.get("metadata", {})
+        if "content" in doc:
+            return str(doc["content"]), {k: v for k, v in doc.items() if k != "content"}
+        # If no specific content field, use the entire doc as text
+        return json.dumps(doc), {}
+    return str(doc), {}
+
+def extract_texts_and_metadatas(docs):
+    """Split loaded documents (any iterable, e.g. the load_data generator) into texts and metadata dicts"""
+    texts = []
+    metadatas = []
+    for doc in docs:
+        text, metadata = rule_text_and_metadata(doc)
+        texts.append(text)
+        metadatas.append(metadata)
+    return texts, metadatas
+
+def iter_rule_batches(docs, size):
+    """Group loaded documents into lists of at most `size` (text, metadata) pairs, lazily"""
+    batch = []
+    for doc in docs:
+        batch.append(rule_text_and_metadata(doc))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def load_cached_vectors():
+    """content hash -> vector lookup over the local artifact (None if missing, another model or vector space)
+
+    The matrix stays memory-mapped; only the rows asked for are read.
+    """
+    if not artifact_exists(ARTIFACT_DIR):
+        return lambda h: None
+    try:
+        old_vectors, old_rules, manifest = load_artifact(ARTIFACT_DIR, mmap=True)
+        if manifest.get("model") != EMBEDDING_MODEL:
+            return lambda h: None
+        if not backends_compatible(manifest.get("embedding_backend"), EMBEDDING_BACKEND):
+            return lambda h: None
+        rows = {rule["content_hash"]: i for i, rule in enumerate(old_rules)}
+        return lambda h: old_vectors[rows[h]].astype("float32").tolist() if h in rows else None
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable embedding artifact: {e}")
+        return lambda h: None
+
+def embed_with_artifact_reuse(texts, metadatas, embeddings):
+    """Embed only rules whose content hash is not already in the local artifact"""
+    hashes = [content_hash(text, metadata) for text, metadata in zip(texts, metadatas)]
+    cached_vector = load_cached_vectors()
+
+    vectors = [cached_vector(h) for h in hashes]
+    del cached_vector  # release the old artifact's memory map before it is rewritten
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    print(f"🧮 Reusing {len(texts) - len(missing)} cached embeddings, embedding {len(missing)} new/changed rules...")
+
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        chunk = missing[start:start + EMBED_BATCH_SIZE]
+        for i, vector in zip(chunk, embeddings.embed_documents([texts[i] for i in chunk])):
+            vectors[i] = vector
+    return vectors, hashes
+
+def artifact_reusable():
+    """Was the local artifact embedded by this run's model and vector space?"""
+    if not artifact_exists(ARTIFACT_DIR):
+        return False
+    manifest = read_manifest(ARTIFACT_DIR)
+    return manifest.get("model") == EMBEDDING_MODEL and backends_compatible(manifest.get("embedding_backend"), EMBEDDING_BACKEND)
+
+def embed_corpus_sentences(texts, embeddings):
+    """Sentence vectors for the prompt context assembler, reusing the previous artifact's"""
+    assembler = ContextAssembler(embeddings)
+    if artifact_reusable():
+        assembler.load(ARTIFACT_DIR)
+    added = assembler.precompute(texts, batch_size=EMBED_BATCH_SIZE)
+    print(f"🧮 Embedded {added} new/changed rule sentences for prompt assembly")
+    return assembler
+
+def write_embedding_artifact(texts, metadatas, vectors, embeddings):
+    """Persist the corpus vectors for the in-process retriever"""
+    # Before the manifest is rewritten: the old sentence vectors are only reused if compatible
+    try:
+        assembler = embed_corpus_sentences(texts, embeddings)
+    except Exception as e:
+        assembler = None
+        print(f"⚠️ Could not embed rule sentences: {e}")
 
-def delete_collection_if_exists():
-    """Delete collection if it exists - separate function to avoid client conflicts"""
     try:
-        client = QdrantClient(
-            url=QDRANT_URL,
-            api_key=API_KEY,
-            timeout=TIMEOUT
+        print(f"💾 Writing embedding artifact to {ARTIFACT_DIR}...")
+        manifest = write_artifact(
+            ARTIFACT_DIR, texts, metadatas, vectors,
+            model_name=EMBEDDING_MODEL, dtype=ARTIFACT_DTYPE, backend=EMBEDDING_BACKEND
         )
-        
+        print(f"✅ Artifact written: {manifest['count']} rules, dim={manifest['dim']}, "
+              f"corpus={manifest['corpus_hash'][:12]}")
+    except Exception as e:
+        print(f"⚠️ Could not write embedding artifact: {e}")
+
+    # Lexical side of hybrid retrieval, loaded once per serving process
+    try:
+        index = BM25Index([{"page_content": t, "metadata": m} for t, m in zip(texts, metadatas)])
+        index.save(ARTIFACT_DIR)
+        print(f"✅ BM25 index written: {len(index.postings)} terms over {len(index)} rules")
+    except Exception as e:
+        print(f"⚠️ Could not write BM25 index: {e}")
+
+    # Routing centroids, so serving never embeds the corpus at startup
+    try:
+        rules = [{"page_content": t, "metadata": m} for t, m in zip(texts, metadatas)]
+        classifier = build_intent_classifier(embeddings, rules, INTENT_EXAMPLES_FILE, rule_vectors=vectors)
+        classifier.save(ARTIFACT_DIR, examples_hash(INTENT_EXAMPLES_FILE))
+        print(f"✅ Intent centroids written: {len(classifier.groups)} groups")
+    except Exception as e:
+        print(f"⚠️ Could not write intent centroids: {e}")
+
+    # Serving loads these instead of embedding rule sentences on the request path
+    if assembler is not None:
+        try:
+            assembler.save(ARTIFACT_DIR, texts)
+            print("✅ Sentence vectors written for prompt assembly")
+        except Exception as e:
+            print(f"⚠️ Could not write sentence vectors: {e}")
+
+def delete_collection_if_exists(client):
+    """Delete collection if it exists"""
+    try:
         if client.collection_exists(collection_name=COLLECTION_NAME):
             client.delete_collection(collection_name=COLLECTION_NAME)
             print(f"🗑️ Deleted existing collection: {COLLECTION_NAME}")
         else:
             print(f"ℹ️ Collection {COLLECTION_NAME} does not exist")
-            
-        client.close()
     except Exception as e:
         print(f"⚠️ Could not delete collection: {e}")
 
-def upload_to_qdrant():
-    """Upload documents to Qdrant vector store with improved error handling"""
-    try:
-        # Delete existing collection if needed
-        delete_collection_if_exists()
-        
-        # Load documents
-        docs = load_data(DATA_DIR)
-        if not docs:
-            print("❌ No data found to upload.")
-            return
+def ensure_payload_indexes(client):
+    """Keyword payload indexes on the rule tags, so filtered searches only touch matching points"""
+    indexed = client.get_collection(COLLECTION_NAME).payload_schema or {}
+    for field in PAYLOAD_INDEX_FIELDS:
+        key = f"metadata.{field}"
+        if key in indexed:
+            continue
+        client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name=key,
+            field_schema=PayloadSchemaType.KEYWORD,
+            wait=True,
+        )
+        print(f"🗂️ Created payload index on {key}")
 
-        # Extract texts and metadata
-        texts = []
-        metadatas = []
-        
-        for doc in docs:
-            if isinstance(doc, dict):
-                # Handle different document structures
-                if "page_content" in doc:
-                    texts.append(str(doc["page_content"]))
-                    metadatas.append(doc.get("metadata", {}))
-                elif "content" in doc:
-                    texts.append(str(doc["content"]))
-                    metadatas.append({k: v for k, v in doc.items() if k != "content"})
-                else:
-                    # If no specific content field, use the entire doc as text
-                    text_content = json.dumps(doc) if isinstance(doc, dict) else str(doc)
-                    texts.append(text_content)
-                    metadatas.append({})
-            else:
-                texts.append(str(doc))
-                metadatas.append({})
-
-        if not texts:
-            print("❌ No valid text content found in documents.")
+def fetch_existing_hashes(client):
+    """Map point id -> stored content hash for every point in the collection.
+
+    Points embedded by an incompatible backend map to None, so they count as changed and get re-embedded.
+    """
+    existing = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=256,
+            offset=offset,
+            with_payload=["content_hash", "embedding_backend"],
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            compatible = backends_compatible(payload.get("embedding_backend"), EMBEDDING_BACKEND)
+            existing[str(point.id)] = payload.get("content_hash") if compatible else None
+        if offset is None:
+            return existing
+
+def upsert_with_retry(client, points, label):
+    """Upsert one batch, retrying with exponential backoff + jitter before giving up"""
+    for attempt in range(1, UPLOAD_RETRIES + 1):
+        try:
+            client.upsert(collection_name=COLLECTION_NAME, points=points, wait=True)
             return
+        except Exception as e:
+            if attempt == UPLOAD_RETRIES:
+                raise
+            delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+            delay += random.uniform(0, delay / 2)
+            print(f"⚠️ Batch {label} failed ({e}); retry {attempt}/{UPLOAD_RETRIES - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+def run_upload_pipeline(client, embeddings, docs, existing, cached_vector, on_batch=None):
+    """Streaming producer/consumer ingestion: this thread embeds, UPLOAD_WORKERS threads upsert.
+
+    Rules flow from `docs` (the load_data generator) in chunks of EMBED_BATCH_SIZE and are
+    dropped once their upserts are queued, so memory stays flat however large the corpus.
+    A rule is upserted when its content hash differs from `existing` (point id -> hash). Vectors
+    come from cached_vector(hash) when the local artifact has them. on_batch(texts, metadatas,
+    vectors), when given, sees every chunk with all its vectors, unchanged rules included.
+    At most UPLOAD_MAX_IN_FLIGHT batches are queued or running at once.
+    Returns (ids of every rule read, ids of rules whose batch still failed after all retries).
+    """
+    in_flight = threading.BoundedSemaphore(UPLOAD_MAX_IN_FLIGHT)
+    submitted = []
+    seen = []
+    counts = {"changed": 0, "embedded": 0}
+
+    print(f"🚀 Streaming rules in chunks of {EMBED_BATCH_SIZE}; uploading with {UPLOAD_WORKERS} workers...")
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="qdrant-upsert") as pool:
+
+        def submit(points):
+            label = f"{len(submitted) + 1}"
+            in_flight.acquire()  # backpressure: blocks embedding when uploads fall behind
+            future = pool.submit(upsert_with_retry, client, points, label)
+            future.add_done_callback(lambda _: in_flight.release())
+            submitted.append(([point.id for point in points], future))
+
+        for chunk in iter_rule_batches(docs, EMBED_BATCH_SIZE):
+            texts = [text for text, _ in chunk]
+            metadatas = [metadata for _, metadata in chunk]
+            # Stable point ids: same zone/rule_id/category -> same point
+            ids = [rule_point_id(metadata) for metadata in metadatas]
+            hashes = [content_hash(text, metadata) for text, metadata in chunk]
+            vectors = [cached_vector(h) for h in hashes]
+            changed = [i for i in range(len(chunk)) if existing.get(ids[i]) != hashes[i]]
+
+            # Unchanged rules only need a vector when the artifact is being written
+            changed_set = set(changed)
+            to_embed = [i for i, vector in enumerate(vectors)
+                        if vector is None and (on_batch is not None or i in changed_set)]
+            if to_embed:
+                for i, vector in zip(to_embed, embeddings.embed_documents([texts[i] for i in to_embed])):
+                    vectors[i] = vector
+
+            for start in range(0, len(changed), BATCH_SIZE):
+                submit([
+                    PointStruct(
+                        id=ids[i],
+                        vector=vectors[i],
+                        payload={
+                            "page_content": texts[i],
+                            "metadata": metadatas[i],
+                            "content_hash": hashes[i],
+                            "embedding_backend": EMBEDDING_BACKEND,
+                        },
+                    )
+                    for i in changed[start:start + BATCH_SIZE]
+                ])
 
-        print(f"📝 Preparing to upload {len(texts)} texts...")
+            if on_batch is not None:
+                on_batch(texts, metadatas, vectors)
+            seen.extend(ids)
+            counts["changed"] += len(changed)
+            counts["embedded"] += len(to_embed)
+            print(f"🧮 Read {len(seen)} rules: {counts['changed']} new/changed, {counts['embedded']} embedded")
+
+        failed = []
+        for batch_ids, future in submitted:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Batch of {len(batch_ids)} rules failed after {UPLOAD_RETRIES} attempts: {e}")
+                failed.extend(batch_ids)
+        print(f"✅ Upserted {counts['changed'] - len(failed)}/{counts['changed']} points")
+
+    return seen, failed
+
+def upload_to_qdrant(recreate=False, artifact=True):
+    """Sync the collection with the rule files: upsert new/changed rules, delete removed ones.
+
+    With artifact=True the local embedding artifact is rewritten too; it is a full copy of the
+    corpus for serving, so only that step holds every rule in memory.
+    Returns True only when every rule made it into the collection.
+    """
+    # One client for the whole run (delete, sync, verify); its connection pool is shared by the upload workers
+    client = make_qdrant_client(QDRANT_URL, API_KEY, timeout=TIMEOUT, pool_size=UPLOAD_WORKERS)
+    try:
+        if recreate:
+            delete_collection_if_exists(client)
 
         # Initialize embeddings
-        print("🔧 Initializing embeddings...")
-        embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}  # Use CPU for compatibility
+        print(f"🔧 Initializing embeddings ({EMBEDDING_BACKEND} backend)...")
+        embeddings = load_embeddings(
+            EMBEDDING_BACKEND,
+            batch_size=EMBED_BATCH_SIZE,
+            device='cpu',  # Use CPU for compatibility
         )
 
-        # Upload in chunks to avoid timeout
-        chunk_size = 50  # Process 50 documents at a time
-        total_chunks = (len(texts) + chunk_size - 1) // chunk_size
-        
-        print(f"📦 Processing {total_chunks} chunks of up to {chunk_size} documents each...")
-        
-        vectorstore = None
-        
-        for i in range(0, len(texts), chunk_size):
-            chunk_end = min(i + chunk_size, len(texts))
-            chunk_texts = texts[i:chunk_end]
-            chunk_metadatas = metadatas[i:chunk_end]
-            
-            chunk_num = i // chunk_size + 1
-            print(f"🚀 Processing chunk {chunk_num}/{total_chunks} ({len(chunk_texts)} documents)...")
-            
-            try:
-                if vectorstore is None:
-                    # Create the vector store with the first chunk
-                    vectorstore = Qdrant.from_texts(
-                        texts=chunk_texts,
-                        embedding=embeddings,
-                        metadatas=chunk_metadatas,
-                        collection_name=COLLECTION_NAME,
-                        url=QDRANT_URL,
-                        api_key=API_KEY,
-                        batch_size=BATCH_SIZE,
-                        force_recreate=True,
-                        timeout=TIMEOUT
-                    )
-                    print(f"✅ Created collection and uploaded chunk {chunk_num}")
-                else:
-                    # Add subsequent chunks to existing collection
-                    vectorstore.add_texts(
-                        texts=chunk_texts,
-                        metadatas=chunk_metadatas,
-                        batch_size=BATCH_SIZE
-                    )
-                    print(f"✅ Added chunk {chunk_num} to existing collection")
-                    
-            except Exception as chunk_error:
-                print(f"❌ Error processing chunk {chunk_num}: {chunk_error}")
-                # Continue with next chunk instead of failing completely
-                continue
-
-        if vectorstore is not None:
-            print(f"🎉 Successfully processed {len(texts)} documents to Qdrant collection: {COLLECTION_NAME}")
+        if not client.collection_exists(collection_name=COLLECTION_NAME):
+            dim = len(embeddings.embed_query("vaasthu"))
+            client.create_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+            )
+            print(f"🆕 Created collection: {COLLECTION_NAME}")
+        ensure_payload_indexes(client)
+
+        existing = fetch_existing_hashes(client)
+
+        # The artifact needs the whole corpus; the Qdrant upload itself streams
+        corpus = ([], [], []) if artifact else None
+
+        def keep_for_artifact(texts, metadatas, vectors):
+            corpus[0].extend(texts)
+            corpus[1].extend(metadatas)
+            corpus[2].extend(vectors)
+
+        # Documents stream straight from the JSON Lines files into the embedding pipeline.
+        # Upsert first, delete after: the collection never goes empty while syncing
+        cached_vector = load_cached_vectors()
+        seen, failed = run_upload_pipeline(
+            client, embeddings, load_data(DATA_DIR), existing, cached_vector,
+            on_batch=keep_for_artifact if artifact else None,
+        )
+        del cached_vector  # release the old artifact's memory map before it is rewritten
+
+        if not seen:
+            print("❌ No data found to upload.")
+            return False
+
+        removed = sorted(set(existing) - set(seen))
+
+        # Keep a local copy of the vectors for serving without re-embedding
+        if artifact:
+            write_embedding_artifact(*corpus, embeddings)
+
+        if removed:
+            client.delete(
+                collection_name=COLLECTION_NAME,
+                points_selector=PointIdsList(points=removed),
+                wait=True,
+            )
+            print(f"🗑️ Deleted {len(removed)} removed rules")
+
+        if failed:
+            print(f"❌ {len(failed)} rules could not be uploaded; re-run to retry just those")
         else:
-            print("❌ Failed to create vector store - all chunks failed")
-            return
-        
+            print(f"🎉 Collection {COLLECTION_NAME} is in sync with {len(seen)} rules")
+
         # Verify upload
-        verify_upload()
-        
+        verify_upload(client)
+        return not failed
+
     except Exception as e:
         print(f"❌ Error during upload: {e}")
         print(f"Error type: {type(e).__name__}")
-        
-        # Try alternative approach with smaller batches
-        print("🔄 Trying with smaller batch size...")
-        try_smaller_batches()
+        return False
+    finally:
+        client.close()
 
-def verify_upload():
+def verify_upload(client):
     """Verify that documents were uploaded successfully"""
     try:
-        client = QdrantClient(
-            url=QDRANT_URL,
-            api_key=API_KEY,
-            timeout=120
-        )
-        
         collection_info = client.get_collection(COLLECTION_NAME)
         point_count = collection_info.points_count
         print(f"✅ Verification: Collection '{COLLECTION_NAME}' contains {point_count} points")
-        
-        client.close()
     except Exception as e:
         print(f"⚠️ Could not verify upload: {e}")
 
+def build_artifact_only():
+    """Write the embedding artifact without touching Qdrant (for VECTOR_BACKEND=numpy)"""
+    texts, metadatas = extract_texts_and_metadatas(load_data(DATA_DIR))
+    if not texts:
+        print("❌ No data found to embed.")
+        return
+    embeddings = load_embeddings(EMBEDDING_BACKEND, batch_size=EMBED_BATCH_SIZE, device='cpu')
+    vectors, _ = embed_with_artifact_reuse(texts, metadatas, embeddings)
+    write_embedding_artifact(texts, metadatas, vectors, embeddings)
+
 def main():
     """Main function to run the upload process"""
+    if "--artifact-only" in sys.argv:
+        print("🏗️ Building local embedding artifact only...")
+        build_artifact_only()
+        return
+
     print("🏗️ Starting Qdrant upload process...")
     
     # Check if required variables are set
@@ -202,7 +487,12 @@ def main():
         print("❌ Please set your actual API_KEY")
         return
     
-    upload_to_qdrant()
+    # --recreate drops the collection first (full rebuild, e.g. after a model change);
+    # --no-artifact skips the local serving copy, keeping ingestion memory flat
+    if not upload_to_qdrant(recreate="--recreate" in sys.argv, artifact="--no-artifact" not in sys.argv):
+        # Non-zero exit so CI / deploy scripts notice a partial ingestion
+        print("❌ Upload process did not complete; see the errors above")
+        sys.exit(1)
     print("✅ Upload process completed!")
 
 if __name__ == "__main__":
@@ -5,15 +5,23 @@
 # Config like host=localhost, port=6333 (default for qdrant)
 
 import os
+import sys
 import json
-from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
 from langchain_qdrant import Qdrant
-from langchain_huggingface import HuggingFaceEmbeddings
+
+# Allow `python db/qdrant_setup_docker.py` from the repo root to import chains.*
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chains.clients import make_qdrant_client
+from chains.embedding_backend import load_embeddings
 
 def load_data(data_dir):
     docs = []
     for file in os.listdir(data_dir):
-        if file.endswith(".json"):
+        if file.endswith(".jsonl"):
+            with open(os.path.join(data_dir, file), "r", encoding="utf-8") as f:
+                docs.extend(json.loads(line) for line in f if line.strip())
+        elif file.endswith(".json"):
             with open(os.path.join(data_dir, file), "r", encoding="utf-8") as f:
                 data = json.load(f)
                 if isinstance(data, list):
@@ -23,14 +31,16 @@ def load_data(data_dir):
     return docs
 
 def upload_to_qdrant(collection_name="vaasthu_rules"):
-    client = QdrantClient(host="localhost", port=6333)
+    # One pooled client for the delete, create and upload calls
+    client = make_qdrant_client(host="localhost", port=6333)
 
     # ❗ Delete existing collection to ensure clean upload
     if client.collection_exists(collection_name=collection_name):
         client.delete_collection(collection_name=collection_name)
         print(f"🗑️ Deleted existing collection: {collection_name}")
 
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    # Same EMBEDDING_BACKEND as chains/rag_pipeline_docker.py queries with
+    embeddings = load_embeddings(device='cpu')
 
     docs = load_data("Data/data_for_qdrant")
     if not docs:
@@ -40,12 +50,17 @@ def upload_to_qdrant(collection_name="vaasthu_rules"):
     texts = [doc["page_content"] for doc in docs]
     metadatas = [doc["metadata"] for doc in docs]
 
-    Qdrant.from_texts(
+    # Same collection layout Qdrant.from_texts creates, without it opening a second client
+    dim = len(embeddings.embed_query(texts[0]))
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+    )
+    Qdrant(client=client, collection_name=collection_name, embeddings=embeddings).add_texts(
         texts=texts,
-        embedding=embeddings,
         metadatas=metadatas,
-        collection_name=collection_name
     )
+    client.close()
 
     print(f"✅ Uploaded {len(docs)} documents to Qdrant collection: {collection_name}")
 
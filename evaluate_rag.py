@@ -1,55 +1,121 @@
 # evaluate_rag_simple.py
+import os
+import sys
 import json
 import time
+import asyncio
 from datasets import Dataset
 from ragas.metrics import faithfulness, answer_relevancy, context_precision, context_recall
 from ragas import evaluate
-from chains.rag_pipeline import route_query
+from ragas.run_config import RunConfig
+from chains.rag_pipeline_with_ragas_eval import route_query
+from chains.rate_limiter import (
+    RateLimiter,
+    backoff_delay,
+    estimate_tokens,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
 from langchain_groq import ChatGroq  
 from langchain_community.embeddings import HuggingFaceEmbeddings  
 from tqdm import tqdm
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
 
-def prepare_data_with_rate_limiting(eval_data, delay=10):
-    """Prepare data with built-in rate limiting"""
-    ragas_data = []
-    
-    print(f"Processing {len(eval_data)} questions with {delay}s delay between batches of 5...")
-    
-    for i, item in enumerate(tqdm(eval_data, desc="Processing questions")):
+# ⚙️ Runner config (defaults fit the Groq free tier: 30 RPM / 6000 TPM)
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "4"))        # questions in flight
+EVAL_RPM = float(os.getenv("EVAL_RPM", "30"))                      # requests per minute, 0 = unlimited
+EVAL_TPM = float(os.getenv("EVAL_TPM", "6000"))                    # tokens per minute, 0 = unlimited
+EVAL_TOKENS_PER_QUERY = int(os.getenv("EVAL_TOKENS_PER_QUERY", "1200"))  # estimate before the call
+EVAL_MAX_RETRIES = int(os.getenv("EVAL_MAX_RETRIES", "6"))
+EVAL_CHECKPOINT = os.getenv("EVAL_CHECKPOINT", "ragas_eval_checkpoint.jsonl")
+PROMPT_OVERHEAD_TOKENS = 200  # template text around the question and context
+
+def load_checkpoint(path):
+    """question -> finished record from an earlier (possibly interrupted) run"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a killed run
+            done[record["question"]] = record
+    return done
+
+async def answer_with_retries(item, limiter):
+    """One question through route_query, within the rate limits, retrying 429s with backoff"""
+    question = item["question"]
+
+    for attempt in range(1, EVAL_MAX_RETRIES + 1):
+        await limiter.acquire(EVAL_TOKENS_PER_QUERY)
         try:
-            # Add delay every 5 items to respect rate limits
-            if i > 0 and i % 5 == 0:
-                print(f"\n⏳ Processed {i} items. Sleeping for {delay} seconds...")
-                time.sleep(delay)
-            
-            pred = route_query(item["question"])
-            
-            ragas_data.append({
-                "question": item["question"],
-                "answer": pred["answer"],          
-                "ground_truth": item["ground_truth"],
-                "contexts": pred.get("contexts", [""])  
-            })
-            
+            pred = await asyncio.to_thread(route_query, question)
+            # The pipeline reports LLM failures as an "Error: ..." answer; never score those
+            if pred["answer"].startswith("Error:"):
+                raise RuntimeError(pred["answer"])
         except Exception as e:
-            print(f"\n❌ Error processing question {i}: {str(e)}")
-            # Add placeholder to maintain data alignment
-            ragas_data.append({
-                "question": item["question"],
-                "answer": "Could not generate answer due to error",          
-                "ground_truth": item["ground_truth"],
-                "contexts": [""]  
-            })
-            
-            # Sleep longer after errors
-            time.sleep(15)
-            
-    return ragas_data
+            if attempt == EVAL_MAX_RETRIES:
+                raise
+            if is_rate_limit_error(e):
+                limiter.throttle()
+                delay = retry_after_seconds(e) or backoff_delay(attempt)
+                print(f"\n⏳ Rate limited on {question[:40]!r}; retry {attempt} in {delay:.1f}s")
+            else:
+                delay = backoff_delay(attempt)
+                print(f"\n⚠️ {question[:40]!r} failed ({e}); retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        used = estimate_tokens(question, pred["answer"], *pred.get("contexts", [])) + PROMPT_OVERHEAD_TOKENS
+        limiter.record_usage(EVAL_TOKENS_PER_QUERY, used)
+        return {
+            "question": question,
+            "answer": pred["answer"],
+            "ground_truth": item["ground_truth"],
+            "contexts": pred.get("contexts") or [""],
+        }
+
+async def prepare_data_concurrently(eval_data, checkpoint_path=EVAL_CHECKPOINT):
+    """Answer every question with bounded concurrency; finished answers are checkpointed"""
+    done = load_checkpoint(checkpoint_path)
+    pending = [item for item in eval_data if item["question"] not in done]
+    print(f"Processing {len(pending)} questions ({len(eval_data) - len(pending)} from checkpoint) "
+          f"with concurrency {EVAL_CONCURRENCY}, {EVAL_RPM:g} RPM, {EVAL_TPM:g} TPM...")
+
+    limiter = RateLimiter(requests_per_minute=EVAL_RPM, tokens_per_minute=EVAL_TPM)
+    semaphore = asyncio.Semaphore(EVAL_CONCURRENCY)
+    failed = []
+    progress = tqdm(total=len(pending), desc="Processing questions")
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        async def run(item):
+            async with semaphore:
+                try:
+                    record = await answer_with_retries(item, limiter)
+                except Exception as e:
+                    print(f"\n❌ Giving up on {item['question'][:40]!r}: {e}")
+                    failed.append(item["question"])
+                    return
+                finally:
+                    progress.update(1)
+            done[record["question"]] = record
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+
+        await asyncio.gather(*(run(item) for item in pending))
+
+    progress.close()
+    if failed:
+        print(f"⚠️ {len(failed)} questions failed and are left out; re-run to resume them from the checkpoint")
+
+    # Original eval.json order, failed questions excluded
+    return [done[item["question"]] for item in eval_data if item["question"] in done]
 
 def main():
     print("🚀 Starting RAG Evaluation with Rate Limiting...")
@@ -58,12 +124,18 @@ def main():
     with open("Data/eval.json", "r", encoding="utf-8") as f:
         eval_data = json.load(f)
     
-    # For testing, limit to first 20 items (remove this line for full evaluation)
-    eval_data = eval_data[:20]
+    # --fresh ignores answers checkpointed by an earlier run
+    if "--fresh" in sys.argv and os.path.exists(EVAL_CHECKPOINT):
+        os.remove(EVAL_CHECKPOINT)
     print(f"📊 Evaluating {len(eval_data)} questions...")
     
-    # Step 2: Prepare dataset with rate limiting
-    ragas_data = prepare_data_with_rate_limiting(eval_data, delay=12)
+    # Step 2: Prepare dataset concurrently within the provider quota
+    start = time.perf_counter()
+    ragas_data = asyncio.run(prepare_data_concurrently(eval_data))
+    print(f"⏱️ Answered {len(ragas_data)} questions in {time.perf_counter() - start:.1f}s")
+    if not ragas_data:
+        print("❌ No answers to evaluate.")
+        return
     dataset = Dataset.from_list(ragas_data)
     
     # Step 3: Configure LLM with conservative settings
@@ -89,7 +161,9 @@ def main():
             metrics=[faithfulness, answer_relevancy],  # Start with fewer metrics
             llm=llm,
             embeddings=embeddings,
-            batch_size=2  # Very small batch size
+            batch_size=2,  # Very small batch size
+            # Judge calls share the same Groq quota: same concurrency, backoff on 429s
+            run_config=RunConfig(max_workers=EVAL_CONCURRENCY, max_retries=EVAL_MAX_RETRIES, max_wait=60),
         )
         
         # Step 6: Print and Save results
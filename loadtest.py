@@ -0,0 +1,276 @@
+# loadtest.py
+# HTTP load generator for POST /query (ui/app.py).
+# Sends a weighted mix of real eval questions, vague Vaasthu-ish questions (low/high
+# confidence) and small talk (fallback), and reports throughput, error rate and
+# p50/p95/p99 latency per routing branch (from the X-Vaasthu-Branch response header).
+#
+# Without --url it starts the app in-process against local stand-ins, so the numbers
+# measure our code rather than Qdrant/Groq:
+#   VECTOR_BACKEND=numpy           in-process index instead of Qdrant
+#   LLM_CASSETTE_MODE=replay       recorded completions instead of Groq (stub on a miss),
+#   LLM_CASSETTE_LATENCY=...       with a simulated LLM delay (default lognormal:600,0.4)
+#
+#   python loadtest.py --concurrency 16 --requests 500       # closed loop
+#   python loadtest.py --rate 20 --duration 60               # open loop, Poisson arrivals
+#   python loadtest.py --url http://localhost:8000 --rate 5  # an already running server
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+EVAL_FILE = "Data/eval.json"
+
+# Vaasthu-flavoured but naming no room or direction: still routed to rag
+VAGUE_QUERIES = [
+    "What brings prosperity and peace to a home?",
+    "How can I improve the energy flow in my house?",
+    "Which colours are considered auspicious for walls?",
+    "Is it fine to keep plants indoors as per vastu?",
+    "What should I consider before buying a plot?",
+    "How important is natural light in vastu?",
+    "Can mirrors affect the energy of a house?",
+    "What are the basic principles of vastu shastra?",
+    "How do I make my home feel more positive?",
+    "Does the shape of a plot matter?",
+]
+
+# Synthetic small talk and noise: should take the greeting / out_of_domain branches
+SMALL_TALK = [
+    "hi", "hello there", "good morning!", "how are you?", "thanks a lot",
+    "who are you?", "tell me a joke", "what's the weather like today?",
+    "asdfgh qwerty", "ok bye", "what is the capital of France?", "lol",
+]
+
+DEFAULT_MIX = "eval=0.6,vague=0.2,smalltalk=0.2"
+
+def load_query_pools(eval_file):
+    with open(eval_file, "r", encoding="utf-8") as f:
+        eval_questions = [item["question"] for item in json.load(f)]
+    return {"eval": eval_questions, "vague": VAGUE_QUERIES, "smalltalk": SMALL_TALK}
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def make_sampler(pools, mix, seed):
+    rng = random.Random(seed)
+    kinds = [kind for kind in mix if mix[kind] > 0]
+    weights = [mix[kind] for kind in kinds]
+    unknown = set(kinds) - set(pools)
+    if unknown:
+        raise SystemExit(f"❌ Unknown query kinds in --mix: {', '.join(sorted(unknown))}")
+
+    def sample():
+        kind = rng.choices(kinds, weights)[0]
+        return kind, rng.choice(pools[kind])
+
+    return sample
+
+# -------------------------
+# 🏗️ In-process server with stand-ins
+# -------------------------
+
+def start_local_server(port):
+    os.environ.setdefault("VECTOR_BACKEND", "numpy")
+    os.environ.setdefault("LLM_CASSETTE_MODE", "replay")
+    os.environ.setdefault("LLM_CASSETTE_ON_MISS", "stub")
+    os.environ.setdefault("LLM_CASSETTE_LATENCY", "lognormal:600,0.4")
+
+    import uvicorn
+    from ui.app import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+async def wait_until_ready(client, url, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{url}/readyz")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit(f"❌ {url} did not become ready within {timeout}s")
+
+# -------------------------
+# 🚀 Load generation
+# -------------------------
+
+async def send_query(client, url, kind, query, scheduled_at, results):
+    """One request; latency is measured from the scheduled send time (no coordinated omission)."""
+    try:
+        response = await client.post(f"{url}/query", json={"query": query})
+        status = response.status_code
+        branch = response.headers.get("X-Vaasthu-Branch", "unknown") if status == 200 else f"http_{status}"
+    except httpx.HTTPError as e:
+        status, branch = None, f"client_{type(e).__name__}"
+    results.append({
+        "kind": kind,
+        "branch": branch,
+        "status": status,
+        "latency": time.perf_counter() - scheduled_at,
+    })
+
+async def run_closed_loop(client, url, sample, concurrency, total, results):
+    """`concurrency` users, each sending its next query as soon as the previous one returns."""
+    remaining = iter(range(total))
+
+    async def user():
+        for _ in remaining:
+            kind, query = sample()
+            await send_query(client, url, kind, query, time.perf_counter(), results)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+async def run_open_loop(client, url, sample, rate, duration, seed, results):
+    """Poisson arrivals at `rate` req/s for `duration` seconds, regardless of how fast we answer."""
+    rng = random.Random(seed + 1)
+    tasks = []
+    start = time.perf_counter()
+    next_at = start
+    while next_at - start < duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, query = sample()
+        tasks.append(asyncio.create_task(send_query(client, url, kind, query, next_at, results)))
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+# -------------------------
+# 📊 Report
+# -------------------------
+
+def summarize(samples):
+    latencies = np.array([s["latency"] for s in samples]) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean()),
+    }
+
+def build_report(results, elapsed, mode):
+    ok = [r for r in results if r["status"] == 200 and r["branch"] != "error"]
+    shed = [r for r in results if r["status"] == 503]
+    errors = [r for r in results if r["status"] not in (200, 503) or r["branch"] == "error"]
+
+    by_branch = defaultdict(list)
+    by_kind = defaultdict(list)
+    for r in results:
+        by_branch[r["branch"]].append(r)
+        by_kind[r["kind"]].append(r)
+
+    return {
+        "mode": mode,
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "shed_rate": len(shed) / len(results) if results else 0.0,
+        "overall": summarize(ok) if ok else {},
+        "by_branch": {branch: summarize(rs) for branch, rs in sorted(by_branch.items())},
+        "by_kind": {
+            kind: {**summarize(rs), "branches": dict(sorted(
+                {b: sum(1 for r in rs if r["branch"] == b) for b in {r["branch"] for r in rs}}.items()
+            ))}
+            for kind, rs in sorted(by_kind.items())
+        },
+    }
+
+def print_report(report):
+    print(f"\n📊 Load test ({report['mode']}): {report['requests']} requests in {report['elapsed_s']:.1f}s")
+    print(f"   throughput {report['throughput_rps']:.1f} req/s, "
+          f"errors {report['error_rate']:.1%}, shed (503) {report['shed_rate']:.1%}")
+    if report["overall"]:
+        o = report["overall"]
+        print(f"   overall    p50 {o['p50_ms']:.0f} ms, p95 {o['p95_ms']:.0f} ms, p99 {o['p99_ms']:.0f} ms")
+
+    print("\n🔀 Latency by routing branch:")
+    print(f"   {'branch':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for branch, s in report["by_branch"].items():
+        print(f"   {branch:<18}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+    print("\n🧪 Query mix → branches taken:")
+    for kind, s in report["by_kind"].items():
+        branches = ", ".join(f"{b}={n}" for b, n in s["branches"].items())
+        print(f"   {kind:<10} {s['count']:>5}  ({branches})")
+
+async def main_async(args):
+    pools = load_query_pools(args.eval_file)
+    sample = make_sampler(pools, parse_mix(args.mix), args.seed)
+
+    url = args.url
+    server = None
+    if url is None:
+        if args.no_cache:
+            os.environ["ANSWER_CACHE_ENABLED"] = "false"
+        print("🏗️ Starting the app in-process with local stand-ins (numpy index, replayed LLM)...")
+        server, _ = start_local_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await wait_until_ready(client, url)
+        results = []
+        start = time.perf_counter()
+        if args.rate:
+            mode = f"open loop, {args.rate:g} req/s for {args.duration:g}s"
+            await run_open_loop(client, url, sample, args.rate, args.duration, args.seed, results)
+        else:
+            mode = f"closed loop, {args.concurrency} users, {args.requests} requests"
+            await run_closed_loop(client, url, sample, args.concurrency, args.requests, results)
+        elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.should_exit = True
+    return build_report(results, elapsed, mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /query")
+    parser.add_argument("--url", default=None, help="server to test (default: start one in-process)")
+    parser.add_argument("--port", type=int, default=8765, help="port for the in-process server")
+    parser.add_argument("--concurrency", type=int, default=8, help="closed loop: concurrent users")
+    parser.add_argument("--requests", type=int, default=200, help="closed loop: total requests")
+    parser.add_argument("--rate", type=float, default=None, help="open loop: arrivals per second")
+    parser.add_argument("--duration", type=float, default=30, help="open loop: seconds to send for")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"query mix weights (default {DEFAULT_MIX})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="in-process server only: disable the answer cache so every query runs its branch")
+    parser.add_argument("--eval-file", default=EVAL_FILE)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report saved to {args.json}")
+
+    if not report["requests"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules the way the scripts do: from the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return os.path.join(REPO_ROOT, "Data")
@@ -0,0 +1,30 @@
+# Deterministic stand-ins for the embedder and the LLM, so tests run offline.
+
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class HashEmbeddings(Embeddings):
+    """Bag of hashed words: texts sharing words get similar vectors; counts every call."""
+
+    model_name = "all-MiniLM-L6-v2"
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = []  # texts per embed_documents / embed_query call
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(1)
+        return self._vector(text)
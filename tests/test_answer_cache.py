@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from chains.answer_cache import SemanticAnswerCache, normalize_query
+from chains.numpy_vectorstore import iter_rule_docs
+from chains.query_analyzer import QueryAnalyzer
+
+# Unit-length stand-ins for query embeddings; NEAR is cos 0.96 from BASE
+BASE = [1.0, 0.0, 0.0]
+NEAR = [0.96, 0.28, 0.0]
+FAR = [0.0, 1.0, 0.0]
+
+
+@pytest.fixture(scope="module")
+def analyzer(data_dir):
+    return QueryAnalyzer.from_rules(iter_rule_docs(os.path.join(data_dir, "data_for_qdrant")))
+
+
+def test_normalize_query():
+    assert normalize_query("  Where should the KITCHEN be?? ") == "where should the kitchen be"
+
+
+def test_exact_and_near_duplicate_hits():
+    cache = SemanticAnswerCache(threshold=0.92)
+    cache.store("Where should the kitchen be?", BASE, "southeast")
+    assert cache.lookup("where should the kitchen be", FAR) == "southeast"  # normalized exact match
+    assert cache.lookup("Kitchen direction?", NEAR) == "southeast"
+    assert cache.lookup("Something else entirely", FAR) is None
+
+
+def test_corpus_version_change_clears():
+    cache = SemanticAnswerCache()
+    cache.store("q", BASE, "old", corpus_version="v1")
+    assert cache.lookup("q", BASE, corpus_version="v2") is None
+    assert len(cache) == 0
+
+
+def test_expired_entries_are_not_served():
+    cache = SemanticAnswerCache(ttl_seconds=-1)
+    cache.store("q", BASE, "stale")
+    assert cache.lookup("q", BASE) is None
+
+
+def test_direction_swapped_question_is_not_served(analyzer):
+    cache = SemanticAnswerCache(threshold=0.92)
+    northeast = "What remedies for a kitchen in the northeast?"
+    southwest = "What remedies for a kitchen in the southwest?"
+    ne_signature = analyzer.analyze(northeast).signature()
+    sw_signature = analyzer.analyze(southwest).signature()
+    assert ne_signature != sw_signature
+
+    # The embedder scores the pair as near-duplicates; the signature still tells them apart
+    cache.store(northeast, BASE, "northeast remedy", signature=ne_signature)
+    assert cache.lookup(southwest, NEAR, signature=sw_signature) is None
+    assert cache.lookup("Remedies for a northeast kitchen?", NEAR, signature=ne_signature) == "northeast remedy"
+
+
+def test_zone_swapped_question_is_not_served(analyzer):
+    cache = SemanticAnswerCache(threshold=0.92)
+    kitchen = analyzer.analyze("Is the kitchen fine in the southeast?").signature()
+    bedroom = analyzer.analyze("Is the master bedroom fine in the southeast?").signature()
+    cache.store("Is the kitchen fine in the southeast?", BASE, "yes", signature=kitchen)
+    assert cache.lookup("Is the master bedroom fine in the southeast?", NEAR, signature=bedroom) is None
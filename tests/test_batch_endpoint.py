@@ -0,0 +1,165 @@
+import asyncio
+import inspect
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import ui.app as app_module
+
+
+class FakePipeline:
+    """plan_batch / answer_plan stand-ins: questions mentioning "rule" are answered while
+    planning, the rest need an LLM call that takes longer for earlier questions."""
+
+    def __init__(self):
+        self.planned = []
+        self.llm_calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def plan_batch(self, queries, timers):
+        self.planned.append(list(queries))
+        return [
+            {"response": f"rule: {q}" if "rule" in q else None, "branch": "rule" if "rule" in q else "rag"}
+            for q in queries
+        ]
+
+    def answer_plan(self, query, plan, timer):
+        if plan["response"] is None:
+            with self._lock:
+                self.llm_calls.append(query)
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(0.05 / len(self.llm_calls))  # later calls finish first
+            with self._lock:
+                self.in_flight -= 1
+            return {"query": query, "response": f"llm: {query}", "branch": plan["branch"]}
+        return {"query": query, "response": plan["response"], "branch": plan["branch"]}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = FakePipeline()
+    monkeypatch.setattr(app_module, "plan_batch", fake.plan_batch)
+    monkeypatch.setattr(app_module, "answer_plan", fake.answer_plan)
+    return fake
+
+
+@pytest.fixture
+def client():
+    return TestClient(app_module.app)  # no `with`: the startup warm-up does not run
+
+
+QUERIES = [
+    "Where should the kitchen be?",
+    "Pooja room direction?",
+    "  where should the KITCHEN be ",
+    "rule: septic tank",
+    "Master bedroom placement",
+    "Pooja room direction?",
+]
+
+
+def test_duplicates_answered_once_in_input_order(client, pipeline):
+    response = client.post("/query/batch", json={"queries": QUERIES})
+    assert response.status_code == 200
+    answers = response.json()["answers"]
+
+    assert [a["index"] for a in answers] == list(range(len(QUERIES)))
+    assert [a["query"] for a in answers] == QUERIES
+    assert pipeline.planned == [[
+        "Where should the kitchen be?", "Pooja room direction?", "rule: septic tank", "Master bedroom placement"
+    ]]
+    assert sorted(pipeline.llm_calls) == ["Master bedroom placement", "Pooja room direction?",
+                                          "Where should the kitchen be?"]
+    assert answers[2]["answer"] == answers[0]["answer"] == "llm: Where should the kitchen be?"
+    assert answers[5]["answer"] == answers[1]["answer"]
+    assert answers[3] == {"index": 3, "query": "rule: septic tank", "answer": "rule: rule: septic tank",
+                          "branch": "rule"}
+    assert pipeline.max_in_flight <= app_module.BATCH_LLM_CONCURRENCY
+    assert app_module._pending_queries == 0
+
+
+def test_stream_returns_ndjson_in_order(client, pipeline):
+    response = client.post("/query/batch", json={"queries": QUERIES, "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in items] == list(range(len(QUERIES)))
+    assert items[4]["answer"] == "llm: Master bedroom placement"
+    assert app_module._pending_queries == 0
+
+
+def test_planning_error_answers_every_question_with_an_error(client, monkeypatch):
+    def broken_plan(queries, timers):
+        raise RuntimeError("vector store down")
+
+    monkeypatch.setattr(app_module, "plan_batch", broken_plan)
+    answers = client.post("/query/batch", json={"queries": ["a", "b", "a"]}).json()["answers"]
+    assert [(a["index"], a["branch"]) for a in answers] == [(0, "error"), (1, "error"), (2, "error")]
+    assert app_module._pending_queries == 0
+
+
+@pytest.mark.parametrize("body", [{}, {"queries": "kitchen"}, {"queries": ["kitchen", 3]}])
+def test_bad_input(client, pipeline, body):
+    assert client.post("/query/batch", json=body).status_code == 400
+    assert pipeline.planned == []
+
+
+def test_batch_too_large(client, pipeline):
+    queries = ["q"] * (app_module.QUERY_BATCH_MAX + 1)
+    assert client.post("/query/batch", json={"queries": queries}).status_code == 413
+    assert pipeline.planned == []
+
+
+def test_fan_out_leaves_a_query_worker_free():
+    assert 1 <= app_module.BATCH_LLM_CONCURRENCY <= max(1, app_module.QUERY_WORKERS - 1)
+
+
+def _drop_before_reading(path, body, spec_version):
+    """Drive the ASGI app directly: the client disconnects before any of the body is sent."""
+    messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if spec_version >= "2.4" and message["type"] == "http.response.start":
+            raise OSError("client went away")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    try:
+        asyncio.run(app_module.app(scope, receive, send))
+    except Exception:
+        pass  # ClientDisconnect / OSError surfacing from the server side is expected
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_stream_dropped_before_reading_releases_its_slot(monkeypatch, spec_version):
+    streams = []
+
+    def fake_stream_query(query, timer):
+        def tokens():
+            yield "Southeast."
+        streams.append(tokens())
+        return streams[-1]
+
+    monkeypatch.setattr(app_module, "stream_query", fake_stream_query)
+    _drop_before_reading("/query/stream", {"query": "Where should the kitchen be?"}, spec_version)
+    assert app_module._pending_queries == 0
+    assert inspect.getgeneratorstate(streams[0]) == inspect.GEN_CLOSED
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_batch_stream_dropped_before_reading_releases_its_slot(pipeline, spec_version):
+    _drop_before_reading("/query/batch", {"queries": QUERIES, "stream": True}, spec_version)
+    assert app_module._pending_queries == 0
@@ -0,0 +1,73 @@
+import threading
+
+from langchain_core.documents import Document
+
+from chains.context_assembler import ContextAssembler, answer_token_cap, split_sentences, strip_markup
+from fakes import HashEmbeddings
+
+RULES = [
+    "Kitchen Placement: The **kitchen** should be in the southeast. East is the second choice.",
+    "Kitchen Prohibited Zones: Never build the kitchen in the northeast. Avoid the southwest too.",
+]
+
+
+def test_strip_markup_and_split_sentences():
+    assert strip_markup("## Title\n- **bold** `code`") == "Title bold code"
+    assert split_sentences(RULES[0]) == [
+        "Kitchen Placement: The kitchen should be in the southeast.", "East is the second choice."
+    ]
+
+
+def test_answer_token_cap():
+    assert answer_token_cap(4) == 4 * 40 + 32
+
+
+def test_precomputed_corpus_is_not_embedded_per_query(tmp_path):
+    embeddings = HashEmbeddings()
+    assembler = ContextAssembler(embeddings, max_tokens=300)
+    assert assembler.precompute(RULES) == 4
+    assembler.save(str(tmp_path), RULES)
+
+    # A fresh process loads the saved vectors instead of embedding the rule sentences
+    embeddings = HashEmbeddings()
+    assembler = ContextAssembler(embeddings, max_tokens=300)
+    assert assembler.load(str(tmp_path)) == 4
+    assert assembler.precompute(RULES) == 0
+
+    docs = [Document(page_content=text) for text in RULES]
+    context = assembler.assemble(docs, embeddings.embed_query("where should the kitchen be"))
+    assert "southeast" in context
+    assert embeddings.calls == [1]  # the query only
+
+
+def test_budget_keeps_best_sentences_in_original_order():
+    embeddings = HashEmbeddings()
+    assembler = ContextAssembler(embeddings, max_tokens=20)
+    docs = [Document(page_content=text) for text in RULES]
+    context = assembler.assemble(docs, embeddings.embed_query("never build the kitchen in the northeast"))
+    assert "Never build the kitchen in the northeast." in context
+    assert len(context) < sum(len(text) for text in RULES)
+
+
+class _EvictOnRelease:
+    """Lock stand-in: another thread clears the query-time cache the moment the lock is released."""
+
+    def __init__(self, assembler):
+        self.assembler = assembler
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+
+    def __exit__(self, *exc):
+        self.assembler._vectors.clear()
+        self.lock.release()
+
+
+def test_cache_eviction_by_another_thread_does_not_break_assembly():
+    embeddings = HashEmbeddings()
+    assembler = ContextAssembler(embeddings, max_tokens=300, max_cache=2)
+    assembler._lock = _EvictOnRelease(assembler)
+    docs = [Document(page_content=text) for text in RULES]
+    context = assembler.assemble(docs, embeddings.embed_query("where should the kitchen be"))
+    assert "southeast" in context
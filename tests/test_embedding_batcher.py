@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import pytest
+
+from chains.embedding_batcher import MicroBatchingEmbeddings
+from fakes import HashEmbeddings
+
+
+class _Dispatcher(BaseException):
+    """Not an Exception: the kind of failure that used to kill the dispatcher thread."""
+
+
+class FlakyEmbeddings(HashEmbeddings):
+    """Fails the next embed_documents call with `error`, or returns one vector too few."""
+
+    def __init__(self):
+        super().__init__()
+        self.error = None
+        self.short = False
+
+    def embed_documents(self, texts):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        vectors = super().embed_documents(texts)
+        if self.short:
+            self.short = False
+            return vectors[:-1]
+        return vectors
+
+
+def test_concurrent_queries_get_their_own_vectors():
+    inner = HashEmbeddings()
+    batcher = MicroBatchingEmbeddings(inner, max_batch=8, max_wait_ms=20)
+    texts = [f"kitchen question {i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        vectors = list(pool.map(batcher.embed_query, texts))
+    assert vectors == [inner._vector(text) for text in texts]
+    assert sum(inner.calls) == 16 and max(inner.calls) <= 8
+
+
+@pytest.mark.parametrize("error", [RuntimeError("model crashed"), _Dispatcher("thread killer")])
+def test_failed_batch_raises_in_the_caller_and_the_dispatcher_survives(error):
+    inner = FlakyEmbeddings()
+    batcher = MicroBatchingEmbeddings(inner, timeout_s=5)
+    inner.error = error
+    with pytest.raises(type(error)):
+        batcher.embed_query("kitchen")
+    assert batcher.embed_query("kitchen") == inner._vector("kitchen")
+
+
+def test_short_vector_list_fails_the_batch():
+    inner = FlakyEmbeddings()
+    batcher = MicroBatchingEmbeddings(inner, timeout_s=5)
+    inner.short = True
+    with pytest.raises(RuntimeError, match="0 vectors for 1 texts"):
+        batcher.embed_query("kitchen")
+    assert batcher.embed_query("pooja") == inner._vector("pooja")
+
+
+def test_caller_gives_up_after_the_timeout():
+    release = threading.Event()
+
+    class StuckEmbeddings(HashEmbeddings):
+        def embed_documents(self, texts):
+            release.wait(5)
+            return super().embed_documents(texts)
+
+    batcher = MicroBatchingEmbeddings(StuckEmbeddings(), timeout_s=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.embed_query("kitchen")
+    finally:
+        release.set()
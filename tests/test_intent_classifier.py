@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from chains.embedding_artifact import write_artifact
+from chains.intent_classifier import (
+    DOMAIN_LABEL,
+    IntentClassifier,
+    build_intent_classifier,
+    examples_hash,
+    load_or_build_intent_classifier,
+)
+from fakes import HashEmbeddings
+
+RULES = [
+    {"page_content": "Kitchen Placement: The kitchen should be in the southeast.",
+     "metadata": {"zone": "KITCHEN", "rule_id": "001", "category": "PLACEMENT"}},
+    {"page_content": "Pooja Room Placement: The pooja room belongs in the northeast.",
+     "metadata": {"zone": "POOJA", "rule_id": "001", "category": "PLACEMENT"}},
+]
+
+
+@pytest.fixture
+def examples_file(data_dir):
+    return os.path.join(data_dir, "intent_examples.json")
+
+
+def _write_artifact(out_dir, backend="torch"):
+    embeddings = HashEmbeddings()
+    texts = [rule["page_content"] for rule in RULES]
+    write_artifact(out_dir, texts, [rule["metadata"] for rule in RULES], embeddings.embed_documents(texts),
+                   embeddings.model_name, backend=backend)
+
+
+def test_classifies_greetings_and_domain_questions(examples_file):
+    classifier = build_intent_classifier(HashEmbeddings(), RULES, examples_file)
+    embeddings = HashEmbeddings()
+    assert classifier.classify(embeddings.embed_query("Kitchen Placement")).label == DOMAIN_LABEL
+    intent = classifier.classify(embeddings.embed_query("hello"))
+    assert intent.label == "greeting" and intent.response
+
+
+def test_saved_centroids_load_without_embedding(tmp_path, examples_file):
+    _write_artifact(str(tmp_path))
+    build_intent_classifier(HashEmbeddings(), RULES, examples_file).save(str(tmp_path), examples_hash(examples_file))
+
+    embeddings = HashEmbeddings()
+    classifier = load_or_build_intent_classifier(embeddings, iter([]), examples_file, str(tmp_path), "onnx")
+    assert isinstance(classifier, IntentClassifier)
+    assert embeddings.calls == []
+
+
+def test_stale_centroids_reuse_artifact_rule_vectors(tmp_path, examples_file):
+    _write_artifact(str(tmp_path))
+    build_intent_classifier(HashEmbeddings(), RULES, examples_file).save(str(tmp_path), "other examples")
+
+    embeddings = HashEmbeddings()
+    load_or_build_intent_classifier(embeddings, iter([]), examples_file, str(tmp_path), "torch")
+    assert len(embeddings.calls) == 1  # the short examples only
+
+
+def test_artifact_from_another_vector_space_is_ignored(tmp_path, examples_file):
+    _write_artifact(str(tmp_path), backend="onnx-int8")
+    reference = build_intent_classifier(HashEmbeddings(), RULES, examples_file)
+    reference.save(str(tmp_path), examples_hash(examples_file))
+
+    embeddings = HashEmbeddings()
+    classifier = load_or_build_intent_classifier(embeddings, RULES, examples_file, str(tmp_path), "torch")
+    assert len(embeddings.calls) == 2  # examples and rules, embedded in the query space
+    np.testing.assert_allclose(classifier.centroids, reference.centroids, atol=1e-6)
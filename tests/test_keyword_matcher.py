@@ -0,0 +1,45 @@
+import pytest
+
+from chains.keyword_matcher import KeywordMatcher
+
+KEYWORDS = ["kitchen", "master bedroom", "bedroom", "exit", "east", "northeast", "north", "pooja room"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(KEYWORDS)
+
+
+@pytest.mark.parametrize("text", [
+    "Is my existing house fine?",    # "exit" inside "existing"
+    "At least tell me something",    # "east" inside "least"
+    "What a feast!",
+    "kitchenette design",
+])
+def test_no_substring_matches(matcher, text):
+    assert not matcher.search(text)
+    assert matcher.find(text) == []
+
+
+def test_finds_whole_words_in_order_of_appearance(matcher):
+    assert matcher.find("Kitchen in the North-East? or the  north") == ["kitchen", "north", "east"]
+    assert matcher.find("Where is the exit from the kitchen") == ["exit", "kitchen"]
+
+
+def test_longest_keyword_wins(matcher):
+    assert matcher.find("Master   Bedroom in the northeast") == ["master bedroom", "northeast"]
+
+
+def test_plurals_match(matcher):
+    assert matcher.find("two bedrooms and kitchens") == ["bedroom", "kitchen"]
+
+
+def test_non_ascii_keywords():
+    matcher = KeywordMatcher(["पूजा घर", "kitchen"])
+    assert matcher.find("पूजा घर कहाँ होना चाहिए?") == ["पूजा घर"]
+
+
+def test_empty_matcher():
+    matcher = KeywordMatcher([])
+    assert len(matcher) == 0
+    assert not matcher.search("kitchen")
@@ -0,0 +1,72 @@
+from langchain_core.documents import Document
+
+from chains.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+RULES = [
+    {"page_content": "The septic tank should be in the northwest. Never in the northeast.",
+     "metadata": {"zone": "SEPTIC", "rule_id": "001", "category": "PLACEMENT"}},
+    {"page_content": "The kitchen should be in the southeast; the cook faces east.",
+     "metadata": {"zone": "KITCHEN", "rule_id": "001", "category": "PLACEMENT"}},
+    {"page_content": "Never build the kitchen in the northeast.",
+     "metadata": {"zone": "KITCHEN", "rule_id": "002", "category": "PROHIBITED_ZONES"}},
+    {"page_content": "Keep the brahmasthan open and free of pillars.",
+     "metadata": {"zone": "BRAHMASTHAN", "rule_id": "001", "category": "PLACEMENT"}},
+]
+
+
+def _doc(zone, rule_id, category="PLACEMENT", text=""):
+    return Document(page_content=text, metadata={"zone": zone, "rule_id": rule_id, "category": category})
+
+
+def test_tokenize_folds_compounds_plurals_and_stopwords():
+    assert tokenize("Where should the Septic Tanks be, north-east or South West?") == [
+        "septic", "tank", "northeast", "southwest"
+    ]
+    assert tokenize("bore well near the glass") == ["borewell", "near", "glass"]
+
+
+def test_search_ranks_the_rule_naming_the_element():
+    index = BM25Index(RULES)
+    results = index.search("Can the septic tank be in the north east?", k=2)
+    assert results[0][0].metadata["zone"] == "SEPTIC"
+    assert results[0][1] > results[1][1]
+    assert index.search("pillars in the brahmasthan")[0][0].metadata["zone"] == "BRAHMASTHAN"
+
+
+def test_search_skips_rules_without_shared_terms():
+    assert BM25Index(RULES).search("balcony") == []
+
+
+def test_search_respects_metadata_filter():
+    index = BM25Index(RULES)
+    results = index.search("kitchen northeast", filter={"zone": ["KITCHEN"], "category": ["PROHIBITED_ZONES"]})
+    assert [doc.metadata["rule_id"] for doc, _ in results] == ["002"]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = BM25Index(RULES)
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.corpus_hash == index.corpus_hash
+    query = "kitchen in the northeast"
+    assert [(d.metadata, s) for d, s in loaded.search(query)] == [(d.metadata, s) for d, s in index.search(query)]
+
+
+def test_load_missing_index(tmp_path):
+    assert BM25Index.load(str(tmp_path)) is None
+
+
+def test_rrf_dedups_by_rule_key_and_keeps_first_document():
+    dense = [_doc("KITCHEN", "001", text="dense"), _doc("SEPTIC", "001"), _doc("PLOT", "001")]
+    lexical = [_doc("SEPTIC", "001"), _doc("KITCHEN", "001", text="lexical"), _doc("BALCONY", "001")]
+    fused = reciprocal_rank_fusion([dense, lexical])
+    assert [doc.metadata["zone"] for doc in fused] == ["KITCHEN", "SEPTIC", "PLOT", "BALCONY"]
+    assert fused[0].page_content == "dense"
+
+
+def test_rrf_rewards_agreement_over_a_single_top_rank():
+    fused = reciprocal_rank_fusion([
+        [_doc("PLOT", "001"), _doc("KITCHEN", "001")],
+        [_doc("SEPTIC", "001"), _doc("KITCHEN", "001")],
+    ])
+    assert fused[0].metadata["zone"] == "KITCHEN"
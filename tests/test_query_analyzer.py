@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from chains.numpy_vectorstore import NumpyVectorStore, iter_rule_docs
+from chains.query_analyzer import QueryAnalyzer, canonical_direction, category_intent, metadata_matches
+from fakes import HashEmbeddings
+
+
+@pytest.fixture(scope="module")
+def analyzer(data_dir):
+    return QueryAnalyzer.from_rules(iter_rule_docs(os.path.join(data_dir, "data_for_qdrant")))
+
+
+@pytest.mark.parametrize("category, intent", [
+    ("PLACEMENT", "placement"),
+    ("DIRECTION_GUIDELINES", "placement"),
+    ("AREA_002_PROHIBITED_ZONES", "prohibited"),
+    ("002_NOT_RECOMMENDED", "prohibited"),
+    ("TANK_003_REMEDIAL_ACTIONS", "remedial"),
+    ("004_STRUCTURAL_SOLUTIONS", "remedial"),
+    ("ENERGY_IMPACT", None),
+])
+def test_category_intent(category, intent):
+    assert category_intent(category) == intent
+
+
+@pytest.mark.parametrize("text, direction", [
+    ("North-East", "northeast"), ("south west", "southwest"), ("centre", "center"),
+    ("Brahmasthan", "center"), ("east", "east"), ("kitchen", None),
+])
+def test_canonical_direction(text, direction):
+    assert canonical_direction(text) == direction
+
+
+def test_metadata_matches():
+    metadata = {"zone": "KITCHEN", "category": "PLACEMENT"}
+    assert metadata_matches(metadata, None)
+    assert metadata_matches(metadata, {"zone": ["POOJA", "KITCHEN"]})
+    assert not metadata_matches(metadata, {"zone": ["KITCHEN"], "category": ["PROHIBITED_ZONES"]})
+
+
+def test_zone_and_intent_give_the_full_filter_ladder(analyzer):
+    analysis = analyzer.analyze("Where should the kitchen be?")
+    assert analysis.zones == ["KITCHEN"]
+    assert analysis.intent == "placement"
+    narrow, zone_only, widest = analysis.filters()
+    assert narrow["zone"] == ["KITCHEN"] and "PLACEMENT" in narrow["category"]
+    assert all(category_intent(c) == "placement" for c in narrow["category"])
+    assert zone_only == {"zone": ["KITCHEN"]}
+    assert widest is None
+
+
+def test_zone_without_intent_filters_on_zone_only(analyzer):
+    analysis = analyzer.analyze("Can the septic tank be in North-East?")
+    assert analysis.intent is None
+    assert analysis.filters() == [{"zone": ["SEPTIC"]}, None]
+    assert analysis.directions == ["northeast"]
+
+
+def test_remedy_beats_avoid(analyzer):
+    analysis = analyzer.analyze("My toilet is already in the southwest, what should I avoid?")
+    assert analysis.zones == ["BATHROOM"]
+    assert analysis.intent == "remedial"
+
+
+def test_no_zone_means_no_filter(analyzer):
+    assert analyzer.analyze("What is vaastu?").filters() == [None]
+
+
+def test_several_zones_and_signature(analyzer):
+    analysis = analyzer.analyze("Kitchen or pooja room in the centre, or north east?")
+    assert analysis.zones == ["KITCHEN", "POOJA"]
+    assert analysis.signature() == (("KITCHEN", "POOJA"), ("center", "northeast"))
+    assert analyzer.analyze("pooja room or kitchen? northeast or middle").signature() == analysis.signature()
+
+
+def test_zones_missing_from_the_corpus_are_ignored():
+    analyzer = QueryAnalyzer(["KITCHEN"], ["PLACEMENT"])
+    assert analyzer.analyze("Where should the pooja room go?").zones == []
+
+
+def test_vector_store_searches_only_filtered_rows():
+    rules = [
+        ("kitchen southeast", {"zone": "KITCHEN", "category": "PLACEMENT"}),
+        ("kitchen never northeast", {"zone": "KITCHEN", "category": "PROHIBITED_ZONES"}),
+        ("pooja northeast", {"zone": "POOJA", "category": "PLACEMENT"}),
+    ]
+    embeddings = HashEmbeddings()
+    store = NumpyVectorStore.from_texts([t for t, _ in rules], embeddings, metadatas=[m for _, m in rules])
+    query = embeddings.embed_query("pooja northeast")
+
+    results = store.similarity_search_by_vector_with_score(query, k=3, filter={"zone": ["KITCHEN"]})
+    assert {doc.metadata["zone"] for doc, _ in results} == {"KITCHEN"}
+    assert len(results) == 2
+    assert store.similarity_search_by_vector(query, k=3, filter={"zone": ["SEPTIC"]}) == []
+    assert store.similarity_search_by_vector(query, k=1)[0].metadata["zone"] == "POOJA"
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from chains.numpy_vectorstore import iter_rule_docs
+from chains.rule_engine import RuleEngine, canonical_direction
+
+
+@pytest.fixture(scope="module")
+def engine(data_dir):
+    return RuleEngine.from_json_dir(
+        os.path.join(data_dir, "json_data_format"),
+        corpus=iter_rule_docs(os.path.join(data_dir, "data_for_qdrant")),
+    )
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Where should the kitchen be placed?", "kitchen is best placed in the southeast"),
+    ("Which direction is best for the study room?", "study room is best placed in the northeast"),
+    ("Where should the main door be?", "main door is best placed in the northeast"),
+    ("Is northeast good for master bedroom?", "No. The northeast should be avoided for the master bedroom"),
+    ("Can the bathroom be in the northwest?", "Yes. The northwest is the ideal direction for the bathroom"),
+    ("Which directions should the kitchen avoid?", "must not be placed in the northeast and the southwest"),
+])
+def test_answers_placement_questions(engine, query, expected):
+    answer = engine.answer(query)
+    assert answer is not None and expected in answer
+
+
+@pytest.mark.parametrize("query", [
+    # Objects inside a room, or which way to face: not the room's own placement
+    "Where should the stove be placed in the kitchen?",
+    "Which direction should I face while cooking in the kitchen?",
+    "Which direction should the kitchen sink be?",
+    "In which direction should my head point when sleeping in the master bedroom?",
+    "Where to keep the locker in the master bedroom?",
+    "Where should the toilet seat face?",
+    "Which direction should the desk face in the study room?",
+    # Open-ended, several elements, or no element at all
+    "Why should the kitchen be in the southeast?",
+    "What are the remedies for a kitchen in the northeast?",
+    "Can the kitchen be next to the bathroom?",
+    "Where should the kitchen and the pooja room be?",
+    "Where should I build my house?",
+])
+def test_falls_through_to_rag(engine, query):
+    assert engine.answer(query) is None
+
+
+def test_canonical_direction():
+    assert canonical_direction("North-East") == "northeast"
+    assert canonical_direction("centre") == "center"
+    assert canonical_direction("corners and periphery") is None
+
+
+def _record(element, ideal, priority, prohibited=()):
+    return {"element": element, "ideal_direction": ideal,
+            "direction_priority": list(priority), "prohibited_directions": list(prohibited)}
+
+
+def _placement_rule(zone, text):
+    return {"page_content": text, "metadata": {"zone": zone, "rule_id": "X", "category": "PLACEMENT"}}
+
+
+def test_alternatives_follow_direction_priority_order():
+    engine = RuleEngine([_record("kitchen", "southeast", ["southeast", "south", "east"])])
+    answer = engine.answer("Where should the kitchen be?")
+    assert "the south or the east is the next best choice" in answer
+
+
+def test_skips_record_whose_ideal_is_not_first_priority():
+    # Data/json_data_format pooja room: ideal "east", but direction_priority starts with northeast
+    engine = RuleEngine([_record("pooja room", "east", ["northeast", "east", "north"])])
+    assert len(engine) == 0
+    assert engine.answer("Where should the pooja room be?") is None
+
+
+def test_skips_record_that_contradicts_the_corpus():
+    record = _record("septic tank", "north", ["north"])
+    corpus = [_placement_rule("SEPTIC", "Septic Tank Placement: ideally in the **northwest**, else the west.")]
+    assert len(RuleEngine([record])) == 1
+    assert len(RuleEngine([record], corpus)) == 0
+
+
+def test_shipped_records_agree_with_corpus(engine):
+    assert engine.answer("Where should the pooja room be?") is None
+    assert engine.answer("Where should the septic tank be placed?") is None
@@ -1,16 +1,66 @@
-from fastapi import FastAPI, Request,File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Response, File, UploadFile, Form
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import time
 import os
 
 
 # from chains.rag_pipeline import run_vaasthu_query
-from chains.rag_pipeline import route_query
+from chains.rag_pipeline import route_query, stream_query, plan_batch, answer_plan, warm_up, pipeline_status
+from chains.answer_cache import normalize_query
+from chains.metrics import StageTimer, log_request, render_metrics, METRICS_CONTENT_TYPE
 
 app = FastAPI()
 
+# ⚙️ Inference pool: route_query blocks on embedding, Qdrant and Groq,
+# so it runs off the event loop on a bounded pool of worker threads.
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "4"))
+QUERY_MAX_PENDING = int(os.getenv("QUERY_MAX_PENDING", "16"))  # running + waiting
+
+query_executor = ThreadPoolExecutor(
+    max_workers=QUERY_WORKERS,
+    thread_name_prefix="vaasthu-query",
+)
+_pending_queries = 0
+
+# 📦 Batch endpoint: questions per request, and LLM calls in flight per batch.
+# A batch counts once against QUERY_MAX_PENDING, so its fan-out stays below
+# QUERY_WORKERS to leave at least one worker free for single /query calls.
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "64"))
+BATCH_LLM_CONCURRENCY = max(1, min(
+    int(os.getenv("BATCH_LLM_CONCURRENCY", "4")),
+    QUERY_WORKERS - 1,
+))
+
+
+class _GuardedStreamingResponse(StreamingResponse):
+    """StreamingResponse that always runs on_finish once the response is over.
+
+    The body generator's own finally is not enough: it never runs if the client disconnects
+    before Starlette starts iterating it, and a generator parked at a yield when the send fails
+    is only closed whenever it is garbage-collected. on_finish must be safe to call twice.
+    """
+
+    def __init__(self, content, on_finish, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_finish = on_finish
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                aclose = getattr(self.body_iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()  # let the generator's own cleanup run now
+            finally:
+                self.on_finish()
+
 # Directory to store uploaded files
 UPLOAD_DIR = "contributes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -53,25 +103,265 @@ async def upload_file_with_text(
         return JSONResponse(status_code=500, content={"error": str(e)})
 # ✅ POST /query endpoint
 @app.post("/query")
-async def handle_query(request: Request):
+async def handle_query(request: Request, response: Response):
+    started = time.perf_counter()
     body = await request.json()
     query_text = body.get("query", "")
-    print(f"[Query Received] {query_text}")
+
+    # ✅ Shed load instead of piling requests up behind the pool
+    global _pending_queries
+    if _pending_queries >= QUERY_MAX_PENDING:
+        log_request("/query", query_text, None, "shed", time.perf_counter() - started)
+        return JSONResponse(
+            status_code=503,
+            content={"answer": "⚠️ Vaasthu engine is busy. Please try again in a moment."},
+        )
+
+    _pending_queries += 1
+    timer = StageTimer()
+    queued = {"seconds": 0.0}
+
+    def run():
+        queued["seconds"] = time.perf_counter() - started
+        return route_query(query_text, timer)
 
     try:
-        answer = route_query(query_text)
-        print(f"[Answer Returned] {answer}")
+        loop = asyncio.get_running_loop()
+        answer = await loop.run_in_executor(query_executor, run)
     except Exception as e:
-        print(f"[Error] {e}")
+        log_request("/query", query_text, timer, "error", time.perf_counter() - started,
+                    queued["seconds"], error=f"{type(e).__name__}: {e}")
+        response.headers["X-Vaasthu-Branch"] = "error"
         return {"answer": "⚠️ Error in Vaasthu engine."}
+    finally:
+        _pending_queries -= 1
 
     # ✅ Handle cases where answer is missing or in incorrect format
     if not answer or "response" not in answer:
+        log_request("/query", query_text, timer, "empty", time.perf_counter() - started, queued["seconds"])
         return {"answer": "⚠️ No response generated."}
 
+    log_request("/query", query_text, timer, "ok", time.perf_counter() - started, queued["seconds"])
+
+    # ✅ Routing branch for load tests / debugging; the body stays frontend-shaped
+    response.headers["X-Vaasthu-Branch"] = answer.get("branch", "unknown")
+
     # ✅ Return only the response part for frontend
     return {"answer": answer["response"]}
 
-# ✅ Mount frontend AFTER API routes
+# ✅ POST /query/stream endpoint (Server-Sent Events, one event per LLM token chunk)
+@app.post("/query/stream")
+async def handle_query_stream(request: Request):
+    started = time.perf_counter()
+    body = await request.json()
+    query_text = body.get("query", "")
+
+    global _pending_queries
+    if _pending_queries >= QUERY_MAX_PENDING:
+        log_request("/query/stream", query_text, None, "shed", time.perf_counter() - started)
+        return JSONResponse(
+            status_code=503,
+            content={"answer": "⚠️ Vaasthu engine is busy. Please try again in a moment."},
+        )
+
+    _pending_queries += 1
+    timer = StageTimer()
+    tokens = stream_query(query_text, timer)
+    done = object()
+    queued = {"seconds": None}
+    finished = {"done": False}
+
+    def step():
+        if queued["seconds"] is None:
+            queued["seconds"] = time.perf_counter() - started
+        return next(tokens, done)
+
+    def finish(status="disconnected", error=None):
+        # Releases the admission slot exactly once, however the response ends
+        global _pending_queries
+        if finished["done"]:
+            return
+        finished["done"] = True
+        try:
+            tokens.close()
+        except ValueError:
+            pass  # client went away while a worker was still inside the generator
+        _pending_queries -= 1
+        log_request("/query/stream", query_text, timer, status, time.perf_counter() - started,
+                    queued["seconds"] or 0.0, error=error)
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        status, error = "disconnected", None
+        try:
+            while True:
+                # Each blocking step of the generator runs on the inference pool
+                token = await loop.run_in_executor(query_executor, step)
+                if token is done:
+                    break
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield f"data: {json.dumps({'done': True})}\n\n"
+            status = "ok"
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            yield f"data: {json.dumps({'error': '⚠️ Error in Vaasthu engine.'})}\n\n"
+        finally:
+            finish(status, error)
+
+    return _GuardedStreamingResponse(
+        event_stream(),
+        on_finish=finish,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ✅ POST /query/batch endpoint: {"queries": [...], "stream": false}
+# Normalized duplicates are answered once. The distinct questions are embedded in one forward
+# pass and planned together, then their LLM calls fan out with bounded concurrency. Answers come
+# back in input order: one JSON array, or (stream: true) NDJSON lines, each sent as soon as it
+# and every answer before it are ready.
+@app.post("/query/batch")
+async def handle_query_batch(request: Request):
+    started = time.perf_counter()
+    body = await request.json()
+    queries = body.get("queries")
+    stream = bool(body.get("stream", False))
+
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return JSONResponse(status_code=400, content={"error": "'queries' must be a list of strings."})
+    if len(queries) > QUERY_BATCH_MAX:
+        return JSONResponse(status_code=413, content={"error": f"At most {QUERY_BATCH_MAX} queries per batch."})
+
+    # ✅ A batch takes one admission slot, like a single query
+    global _pending_queries
+    if _pending_queries >= QUERY_MAX_PENDING:
+        log_request("/query/batch", f"{len(queries)} queries", None, "shed", time.perf_counter() - started)
+        return JSONResponse(
+            status_code=503,
+            content={"answer": "⚠️ Vaasthu engine is busy. Please try again in a moment."},
+        )
+
+    _pending_queries += 1
+
+    # Distinct questions (first spelling kept); slots[i] is the distinct question behind queries[i]
+    distinct, slot_of, slots = [], {}, []
+    for query_text in queries:
+        key = normalize_query(query_text)
+        if key not in slot_of:
+            slot_of[key] = len(distinct)
+            distinct.append(query_text.strip())
+        slots.append(slot_of[key])
+
+    timers = [StageTimer() for _ in distinct]
+    queued = {"seconds": 0.0}
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    tasks = []
+    finished = {"done": False}
+
+    def finish():
+        # Drops the LLM calls still waiting for a slot (client went away) and releases the
+        # admission slot, exactly once however the response ends
+        global _pending_queries
+        for task in tasks:
+            task.cancel()
+        if not finished["done"]:
+            finished["done"] = True
+            _pending_queries -= 1
+
+    def plan():
+        queued["seconds"] = time.perf_counter() - started
+        return plan_batch(distinct, timers)
+
+    async def answer(i, query_plan):
+        status, error = "ok", None
+        try:
+            if query_plan["response"] is None:
+                async with llm_slots:
+                    result = await loop.run_in_executor(query_executor, answer_plan, distinct[i], query_plan, timers[i])
+            else:
+                result = answer_plan(distinct[i], query_plan, timers[i])
+            item = {"answer": result["response"], "branch": result["branch"]}
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            item = {"answer": "⚠️ Error in Vaasthu engine.", "branch": "error"}
+        log_request("/query/batch", distinct[i], timers[i], status, time.perf_counter() - started,
+                    queued["seconds"], error=error)
+        return item
+
+    async def answers_in_order():
+        try:
+            try:
+                plans = await loop.run_in_executor(query_executor, plan)
+            except Exception as e:
+                log_request("/query/batch", f"{len(queries)} queries", None, "error", time.perf_counter() - started,
+                            queued["seconds"], error=f"{type(e).__name__}: {e}")
+                for position, query_text in enumerate(queries):
+                    yield {"index": position, "query": query_text,
+                           "answer": "⚠️ Error in Vaasthu engine.", "branch": "error"}
+                return
+
+            tasks.extend(asyncio.ensure_future(answer(i, query_plan)) for i, query_plan in enumerate(plans))
+            for position, query_text in enumerate(queries):
+                item = await tasks[slots[position]]
+                yield {"index": position, "query": query_text, **item}
+        finally:
+            finish()
+
+    if stream:
+        async def ndjson():
+            async for item in answers_in_order():
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+
+        return _GuardedStreamingResponse(
+            ndjson(),
+            on_finish=finish,
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return {"answers": [item async for item in answers_in_order()]}
+
+# ✅ Load the model and clients in the background so the port binds immediately
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+@app.on_event("startup")
+async def start_background_warmup():
+    if not WARMUP_ON_STARTUP:
+        return
+
+    def _warm():
+        try:
+            warm_up()
+            print("[Warm-up] Vaasthu pipeline ready")
+        except Exception as e:
+            print(f"[Warm-up Error] {e}")
+
+    asyncio.get_running_loop().run_in_executor(query_executor, _warm)
+
+# ✅ Liveness: the process is up and serving HTTP
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# ✅ Readiness: retrieval and LLM are loaded, so queries will not hit a cold start
+@app.get("/readyz")
+async def readyz():
+    status = pipeline_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+# ✅ Prometheus scrape endpoint: stage / request / queue histograms and routing counters
+@app.get("/metrics")
+async def metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.on_event("shutdown")
+def shutdown_query_executor():
+    query_executor.shutdown(wait=False, cancel_futures=True)
+
+# ✅ Mount frontend AFTER API routes (skipped when the frontend has not been built, e.g. API-only load tests)
 frontend_dist_path = os.path.join(os.path.dirname(__file__), "frontend", "dist")
-app.mount("/", StaticFiles(directory=frontend_dist_path, html=True), name="frontend")
+if os.path.isdir(frontend_dist_path):
+    app.mount("/", StaticFiles(directory=frontend_dist_path, html=True), name="frontend")
+else:
+    print(f"[Frontend] {frontend_dist_path} not found; serving the API only")
@@ -20,11 +20,13 @@ function QueryInput() {
   const [typingDone, setTypingDone] = useState(false);
   const [isFocused, setIsFocused] = useState(false);
   const typingTimeout = useRef(null);
+  const streamedRef = useRef(false);
   const responseRef = useRef(null);
   const textareaRef = useRef(null);
 
   useEffect(() => {
-    if (!loading && response) {
+    // Streamed answers are already rendered token by token
+    if (!loading && response && !streamedRef.current) {
       let i = 0;
       let current = '';
       setTypingDone(false);
@@ -52,23 +54,67 @@ function QueryInput() {
     setFeedback(null);
     setTypingDone(false);
 
+    streamedRef.current = false;
+
     try {
-      const res = await fetch('/query', {
+      const res = await fetch('/query/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ query }),
       });
 
-      const data = await res.json();
-      const answer = data.answer || 'No response received';
-      setTimeout(() => {
-        setResponse(answer);
-      }, 100);
+      const contentType = res.headers.get('content-type') || '';
+      if (!res.body || !contentType.includes('text/event-stream')) {
+        // Busy / error responses come back as plain JSON
+        const data = await res.json();
+        const answer = data.answer || 'No response received';
+        setTimeout(() => {
+          setResponse(answer);
+        }, 100);
+      } else {
+        // Render Server-Sent Events progressively as tokens arrive
+        streamedRef.current = true;
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+        let scrolled = false;
+
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          const events = buffer.split('\n\n');
+          buffer = events.pop() || '';
+          for (const event of events) {
+            if (!event.startsWith('data: ')) continue;
+            const payload = JSON.parse(event.slice(6));
+            if (payload.token) {
+              answer += payload.token;
+              setDisplayText(answer);
+              if (!scrolled) {
+                scrolled = true;
+                responseRef.current?.scrollIntoView({ behavior: 'smooth', block: 'center' });
+              }
+            }
+            if (payload.error) {
+              answer = answer || payload.error;
+              setDisplayText(answer);
+            }
+          }
+        }
+
+        setResponse(answer || 'No response received');
+        setDisplayText(answer || 'No response received');
+        setTypingDone(true);
+      }
 
       setTimeout(() => {
         responseRef.current?.scrollIntoView({ behavior: 'smooth', block: 'center' });
       }, 500);
     } catch (error) {
+      streamedRef.current = false;
       setResponse('⚠️ Something went wrong.');
     }
 